@@ -0,0 +1,46 @@
+import numpy as np
+from modelo import Parametros, ORDEN_PARAMETROS, ORDEN_COMPARTIMIENTOS, campo
+from metodos import PASOS, malla_temporal
+
+# barrido de parámetros: N trayectorias integradas a la vez
+# cada paso de tiempo es una sola operación vectorizada sobre los N escenarios
+
+
+# validar y alinear los arreglos de parámetros (N, 12) e iniciales (N, 4)
+def preparar_lote(parametros,iniciales)->tuple:
+    parametros=np.atleast_2d(np.asarray(parametros,dtype=float))
+    iniciales=np.atleast_2d(np.asarray(iniciales,dtype=float))
+    if parametros.ndim!=2 or parametros.shape[1]!=len(ORDEN_PARAMETROS):
+        raise ValueError("los parámetros deben tener forma (N, {})".format(len(ORDEN_PARAMETROS)))
+    if iniciales.ndim!=2 or iniciales.shape[1]!=len(ORDEN_COMPARTIMIENTOS):
+        raise ValueError("las condiciones iniciales deben tener forma (N, {})".format(len(ORDEN_COMPARTIMIENTOS)))
+    n=max(len(parametros),len(iniciales))
+    if len(parametros) not in (1,n) or len(iniciales) not in (1,n):
+        raise ValueError("parámetros ({}) e iniciales ({}) no tienen el mismo número de escenarios".format(len(parametros),len(iniciales)))
+    parametros=np.ascontiguousarray(np.broadcast_to(parametros,(n,parametros.shape[1])))
+    iniciales=np.ascontiguousarray(np.broadcast_to(iniciales,(n,iniciales.shape[1])))
+    return parametros,iniciales
+
+
+# integrar el lote sobre la malla t, escribiendo en salida de forma (N, len(t), 4)
+def integrar_lote(metodo:str,parametros,iniciales,t:np.ndarray,salida:np.ndarray=None)->np.ndarray:
+    if metodo not in PASOS:
+        raise ValueError("método desconocido para barridos: {}".format(metodo))
+    paso=PASOS[metodo]
+    parametros,iniciales=preparar_lote(parametros,iniciales)
+    f=campo(Parametros.desde_arreglo(parametros))
+    if salida is None:
+        salida=np.empty((len(iniciales),len(t),len(ORDEN_COMPARTIMIENTOS)))
+    y=iniciales.copy()
+    salida[:,0]=y
+    for i in range(len(t)-1):
+        y=paso(f,t[i],y,t[i+1]-t[i])
+        salida[:,i+1]=y
+    return salida
+
+
+# barrido completo sobre la malla t0:tstep:tf
+# devuelve t de forma (T,) y trayectorias de forma (N, T, 4)
+def barrido(metodo:str,parametros,iniciales,t0:float=0,tf:float=20,tstep:float=1)->tuple:
+    t=malla_temporal(t0,tf,tstep)
+    return t,integrar_lote(metodo,parametros,iniciales,t)
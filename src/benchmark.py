@@ -0,0 +1,226 @@
+import argparse
+import compileall
+import json
+import subprocess
+import sys
+import time
+import tracemalloc
+import warnings
+from dataclasses import dataclass, asdict
+import numpy as np
+from modelo import Parametros, campo, jacobiano
+import metodos
+from pathlib import Path
+
+# benchmark y convergencia de los métodos de solución
+# para cada método, régimen de parámetros y paso de tiempo mide tiempo, evaluaciones
+# del lado derecho, memoria pico y error contra una referencia de alta precisión,
+# y ajusta el orden de convergencia empírico
+#
+# uso: python benchmark.py [--metodos ...] [--pasos ...] [--guardar r.json] [--comparar r.json]
+#      python benchmark.py --importacion [--limite-importacion 0.05]
+
+# regímenes de parámetros: (parámetros, estado inicial)
+REGIMENES={
+    "base":(Parametros(10,0.001,0.5,0.1,0.02,0.3,0.2,0.5,0.1,0.05,0.1,0.01),(100.0,2.0,3.0,4.0)),
+    "rigido":(Parametros(10,0.001,0.5,0.1,0.02,300,0.2,0.5,100,50,0.1,0.01),(100.0,2.0,3.0,4.0)),
+}
+PASOS=(1,0.5,0.25,0.125,0.0625)
+# evaluaciones del lado derecho por paso de los métodos de paso fijo
+ETAPAS={"euler_hacia_adelante":1,"euler_modificado":2,"runge_kutta_2":2,"runge_kutta_4":4}
+# métodos con paso interno adaptativo: su error depende de rtol/atol y no de tstep
+ADAPTATIVOS=("dormand_prince","solve_ivp")
+# módulos que deben importarse rápido, sin cargar tkinter, matplotlib ni SciPy
+MODULOS_LIVIANOS=("modelo","metodos","barrido","cache","bloques","resumenes","equilibrio","consola","ui")
+PAQUETES_PESADOS=("tkinter","matplotlib","scipy")
+# segundos de importación además de numpy; numpy solo ya tarda ≈0.07-0.11 s en frío en
+# máquinas lentas y no depende de este código, así que el límite se aplica a lo propio
+LIMITE_IMPORTACION=0.05
+
+
+@dataclass
+class ResultadoBenchmark:
+    metodo:str
+    regimen:str
+    tstep:float
+    tiempo:float            # segundos (mejor de las repeticiones)
+    nfev:int                # evaluaciones del lado derecho
+    memoria_pico:int        # bytes
+    error:float             # error máximo relativo a la escala de la referencia (nan si falló)
+
+
+# resolver con un método por nombre y contar las evaluaciones del lado derecho
+def ejecutar_metodo(metodo:str,p:Parametros,y0,t:np.ndarray)->tuple:
+    if metodo in ETAPAS:
+        return metodos.integrar(metodos.PASOS[metodo],campo(p),y0,t),ETAPAS[metodo]*(len(t)-1)
+    if metodo=="euler_hacia_atras":
+        solucion=metodos.integrar_euler_hacia_atras(campo(p),lambda t,y:jacobiano(y,p),y0,t)
+    elif metodo=="dormand_prince":
+        solucion=metodos.integrar_dormand_prince(campo(p),y0,t)
+    elif metodo=="solve_ivp":
+        solucion=metodos.integrar_solve_ivp(p,y0,t)
+    else:
+        raise ValueError("método desconocido: {}".format(metodo))
+    return solucion.y,solucion.nfev
+
+
+# solución de referencia en la malla t (Radau con tolerancias estrictas)
+def referencia(p:Parametros,y0,t:np.ndarray)->np.ndarray:
+    return metodos.integrar_solve_ivp(p,y0,t,method="Radau",rtol=1e-12,atol=1e-12).y
+
+
+def medir(metodo:str,regimen:str,tstep:float,tf:float=20,repeticiones:int=3,y_ref:np.ndarray=None)->ResultadoBenchmark:
+    p,y0=REGIMENES[regimen]
+    t=metodos.malla_temporal(0,tf,tstep)
+    if y_ref is None:
+        y_ref=referencia(p,y0,t)
+    tiempo=np.inf
+    y=None
+    nfev=0
+    with warnings.catch_warnings(),np.errstate(all="ignore"):
+        warnings.simplefilter("ignore")
+        try:
+            for _ in range(repeticiones):
+                inicio=time.perf_counter()
+                y,nfev=ejecutar_metodo(metodo,p,y0,t)
+                tiempo=min(tiempo,time.perf_counter()-inicio)
+            # la memoria se mide aparte porque tracemalloc hace más lento el código
+            tracemalloc.start()
+            ejecutar_metodo(metodo,p,y0,t)
+            memoria_pico=tracemalloc.get_traced_memory()[1]
+        except (RuntimeError,FloatingPointError):
+            return ResultadoBenchmark(metodo,regimen,tstep,tiempo,nfev,0,float("nan"))
+        finally:
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+        error=float(np.max(np.abs(y-y_ref))/np.max(np.abs(y_ref)))
+    return ResultadoBenchmark(metodo,regimen,tstep,tiempo,nfev,memoria_pico,error if np.isfinite(error) else float("nan"))
+
+
+# pendiente de log(error) contra log(tstep) usando solo errores finitos y por encima del redondeo
+def orden_convergencia(pasos,errores)->float:
+    pasos=np.asarray(pasos,dtype=float)
+    errores=np.asarray(errores,dtype=float)
+    validos=np.isfinite(errores)&(errores>1e-13)
+    if np.count_nonzero(validos)<2:
+        return float("nan")
+    return float(np.polyfit(np.log(pasos[validos]),np.log(errores[validos]),1)[0])
+
+
+def ejecutar_benchmark(nombres_metodos=None,regimenes=None,pasos=PASOS,tf:float=20,repeticiones:int=3)->list:
+    nombres_metodos=nombres_metodos or list(metodos.METODOS)
+    regimenes=regimenes or list(REGIMENES)
+    resultados=[]
+    for regimen in regimenes:
+        p,y0=REGIMENES[regimen]
+        for tstep in pasos:
+            t=metodos.malla_temporal(0,tf,tstep)
+            y_ref=referencia(p,y0,t)
+            for metodo in nombres_metodos:
+                resultados.append(medir(metodo,regimen,tstep,tf,repeticiones,y_ref))
+    return resultados
+
+
+# orden empírico por (método, régimen) de los métodos de paso fijo
+def ordenes(resultados:list)->dict:
+    grupos={}
+    for resultado in resultados:
+        if resultado.metodo in ADAPTATIVOS:
+            continue
+        grupos.setdefault((resultado.metodo,resultado.regimen),[]).append(resultado)
+    return {clave:orden_convergencia([r.tstep for r in grupo],[r.error for r in grupo]) for clave,grupo in grupos.items()}
+
+
+# resultados cuyo tiempo supera tolerancia veces el tiempo de la corrida anterior
+def regresiones(resultados:list,anteriores:list,tolerancia:float=1.5)->list:
+    previos={(r["metodo"],r["regimen"],r["tstep"]):r for r in anteriores}
+    encontrados=[]
+    for resultado in resultados:
+        previo=previos.get((resultado.metodo,resultado.regimen,resultado.tstep))
+        if previo is not None and np.isfinite(previo["tiempo"]) and resultado.tiempo>tolerancia*previo["tiempo"]:
+            encontrados.append((resultado,previo))
+    return encontrados
+
+
+# tiempo de importación en frío de un módulo (mejor de las repeticiones, cada una en un
+# intérprete nuevo) y paquetes pesados que quedaron cargados; los módulos de previos se
+# importan antes de empezar a medir
+def tiempo_importacion(modulo:str,repeticiones:int=5,previos:tuple=())->tuple:
+    codigo=("import sys,time,json;{}inicio=time.perf_counter();import {};fin=time.perf_counter();"
+            "print(json.dumps([fin-inicio,sorted({{m.split('.')[0] for m in sys.modules}}&set({!r}))]))").format(
+                "".join("import {};".format(previo) for previo in previos),modulo,PAQUETES_PESADOS)
+    tiempo=np.inf
+    pesados=[]
+    for _ in range(repeticiones):
+        salida=subprocess.run([sys.executable,"-c",codigo],cwd=Path(__file__).parent,capture_output=True,text=True,check=True).stdout
+        medido,pesados=json.loads(salida)
+        tiempo=min(tiempo,medido)
+    return tiempo,pesados
+
+
+# módulos livianos que tardan más que limite además de numpy o cargan paquetes pesados
+# numpy se importa antes de medir: es el piso de todos y restar dos mediciones en frío
+# de ≈0.1 s deja más ruido que el tiempo propio de los módulos
+def verificar_importacion(modulos=MODULOS_LIVIANOS,limite:float=LIMITE_IMPORTACION,repeticiones:int=5)->list:
+    # compilar antes: con PYTHONDONTWRITEBYTECODE un .pyc desactualizado no se regenera y
+    # cada importación mediría al compilador en vez de la carga del módulo
+    compileall.compile_dir(Path(__file__).parent,maxlevels=0,quiet=1)
+    piso,_=tiempo_importacion("numpy",repeticiones)
+    print("numpy: {:.3f} s".format(piso))
+    print("{:<14}{:>14}  {}".format("módulo","sobre numpy","paquetes pesados"))
+    fallidos=[]
+    for modulo in modulos:
+        tiempo,pesados=tiempo_importacion(modulo,repeticiones,("numpy",))
+        print("{:<14}{:>14.3f}  {}".format(modulo,tiempo,", ".join(pesados) or "-"))
+        if tiempo>limite or pesados:
+            fallidos.append(modulo)
+    return fallidos
+
+
+def imprimir(resultados:list):
+    print("{:<22}{:<8}{:>9}{:>12}{:>10}{:>12}{:>12}".format("método","régimen","tstep","tiempo [s]","nfev","memoria [B]","error"))
+    for r in resultados:
+        print("{:<22}{:<8}{:>9g}{:>12.2e}{:>10d}{:>12d}{:>12.2e}".format(r.metodo,r.regimen,r.tstep,r.tiempo,r.nfev,r.memoria_pico,r.error))
+    print()
+    print("{:<22}{:<8}{:>8}".format("método","régimen","orden"))
+    for (metodo,regimen),orden in ordenes(resultados).items():
+        print("{:<22}{:<8}{:>8.2f}".format(metodo,regimen,orden))
+
+
+def main(argumentos=None)->int:
+    parser=argparse.ArgumentParser(description="Benchmark y convergencia de los métodos de solución SEIL")
+    parser.add_argument("--metodos",nargs="+",choices=list(metodos.METODOS),help="métodos a medir (por defecto todos)")
+    parser.add_argument("--regimenes",nargs="+",choices=list(REGIMENES),help="regímenes de parámetros (por defecto todos)")
+    parser.add_argument("--pasos",nargs="+",type=float,default=list(PASOS),help="pasos de tiempo")
+    parser.add_argument("--tf",type=float,default=20,help="tiempo final")
+    parser.add_argument("--repeticiones",type=int,default=3,help="repeticiones por medición de tiempo")
+    parser.add_argument("--guardar",help="guardar los resultados en un archivo JSON")
+    parser.add_argument("--comparar",help="comparar los tiempos con un JSON guardado antes")
+    parser.add_argument("--tolerancia",type=float,default=1.5,help="factor de tiempo que se considera regresión")
+    parser.add_argument("--importacion",action="store_true",help="medir solo el tiempo de importación de los módulos livianos")
+    parser.add_argument("--limite-importacion",type=float,default=LIMITE_IMPORTACION,help="tiempo máximo de importación por encima de numpy [s]")
+    args=parser.parse_args(argumentos)
+
+    if args.importacion:
+        fallidos=verificar_importacion(limite=args.limite_importacion,repeticiones=args.repeticiones)
+        for modulo in fallidos:
+            print("importación lenta o con paquetes pesados: {}".format(modulo))
+        return 1 if fallidos else 0
+
+    resultados=ejecutar_benchmark(args.metodos,args.regimenes,args.pasos,args.tf,args.repeticiones)
+    imprimir(resultados)
+    if args.guardar:
+        with open(args.guardar,"w",encoding="utf-8") as archivo:
+            json.dump([asdict(r) for r in resultados],archivo,indent=1)
+    if args.comparar:
+        with open(args.comparar,encoding="utf-8") as archivo:
+            encontrados=regresiones(resultados,json.load(archivo),args.tolerancia)
+        for resultado,previo in encontrados:
+            print("regresión: {} {} tstep={:g}: {:.2e} s (antes {:.2e} s)".format(resultado.metodo,resultado.regimen,resultado.tstep,resultado.tiempo,previo["tiempo"]))
+        if encontrados:
+            return 1
+    return 0
+
+
+if __name__=="__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+import numpy as np
+from modelo import Parametros, ORDEN_COMPARTIMIENTOS
+from metodos import numero_puntos, integrar_en_malla
+
+# integración por bloques con memoria constante
+# la malla t0:tstep:tf nunca se crea completa; cada bloque continúa desde el último
+# estado del anterior y puede escribirse directamente a un archivo .npy mapeado en memoria
+
+
+# generador de bloques (t, y) con t de forma (m,) e y de forma (m, 4), m <= tam_bloque
+# progreso, si se da, recibe la fracción completada antes de cada bloque
+def integrar_por_bloques(metodo:str,p:Parametros,y0,t0:float=0,tf:float=20,tstep:float=1,tam_bloque:int=65536,progreso=None):
+    if tam_bloque<2:
+        raise ValueError("el tamaño de bloque debe ser al menos 2")
+    n=numero_puntos(t0,tf,tstep)
+    y=np.asarray(y0,dtype=float)
+    inicio=0
+    while inicio<n:
+        fin=min(inicio+tam_bloque,n)
+        if progreso is not None:
+            progreso(inicio/n)
+        if inicio==0:
+            t=t0+tstep*np.arange(0,fin,dtype=float)
+            bloque=integrar_en_malla(metodo,p,y,t) if fin>1 else y[None,:]
+        else:
+            # la malla incluye el último punto del bloque anterior como condición inicial
+            t=t0+tstep*np.arange(inicio-1,fin,dtype=float)
+            bloque=integrar_en_malla(metodo,p,y,t)
+            t=t[1:]
+            bloque=bloque[1:]
+        y=bloque[-1]
+        yield t,bloque
+        inicio=fin
+
+
+# integrar escribiendo cada bloque en un .npy de forma (n, 5) con columnas t, S, E, I, L
+# devuelve el arreglo mapeado en memoria (solo lectura)
+def integrar_a_archivo(metodo:str,p:Parametros,y0,archivo,t0:float=0,tf:float=20,tstep:float=1,tam_bloque:int=65536,dtype=np.float64,progreso=None)->np.memmap:
+    n=numero_puntos(t0,tf,tstep)
+    salida=np.lib.format.open_memmap(archivo,mode="w+",dtype=dtype,shape=(n,1+len(ORDEN_COMPARTIMIENTOS)))
+    fila=0
+    for t,y in integrar_por_bloques(metodo,p,y0,t0,tf,tstep,tam_bloque,progreso):
+        salida[fila:fila+len(t),0]=t
+        salida[fila:fila+len(t),1:]=y
+        fila+=len(t)
+    salida.flush()
+    del salida
+    return np.load(archivo,mmap_mode="r")
+
+
+# recorrer un .npy escrito por integrar_a_archivo en bloques (t, y) sin cargarlo completo
+def leer_por_bloques(archivo,tam_bloque:int=65536):
+    datos=np.load(archivo,mmap_mode="r")
+    for inicio in range(0,len(datos),tam_bloque):
+        bloque=datos[inicio:inicio+tam_bloque]
+        yield bloque[:,0],bloque[:,1:]
@@ -0,0 +1,134 @@
+import hashlib
+from collections import OrderedDict
+from pathlib import Path
+import numpy as np
+from modelo import Parametros
+from metodos import METODOS, malla_temporal, integrar_en_malla
+
+# caché de soluciones con política LRU y presupuesto de memoria
+# la clave es (método, 12 parámetros, estado inicial, t0, tf, tstep);
+# opcionalmente cada solución también se guarda en una carpeta en disco
+# si solo cambia tf, la solución más larga del mismo escenario se recorta o se continúa
+
+
+# clave de caché hashable con los valores como floats
+def clave_solucion(metodo:str,p:Parametros,y0,t0:float,tf:float,tstep:float)->tuple:
+    return (metodo,tuple(float(x) for x in p),tuple(float(x) for x in y0),float(t0),float(tf),float(tstep))
+
+# la misma clave sin tf: identifica el escenario sobre la malla t0 + i*tstep
+def _escenario(clave:tuple)->tuple:
+    return clave[:4]+clave[5:]
+
+
+class CacheSoluciones:
+    def __init__(self,limite_bytes:int=256*2**20,carpeta:Path=None):
+        self.limite_bytes=limite_bytes
+        self.carpeta=Path(carpeta) if carpeta is not None else None
+        if self.carpeta is not None:
+            self.carpeta.mkdir(parents=True,exist_ok=True)
+        self._entradas=OrderedDict()
+        # clave de la solución con mayor tf de cada escenario
+        self._mas_largas={}
+        self.bytes_usados=0
+        self.aciertos=0
+        self.fallos=0
+
+    def __len__(self)->int:
+        return len(self._entradas)
+
+    def __contains__(self,clave)->bool:
+        archivo=self._archivo(clave)
+        return clave in self._entradas or (archivo is not None and archivo.exists())
+
+    def _archivo(self,clave)->Path:
+        if self.carpeta is None:
+            return None
+        nombre=hashlib.sha1(repr(clave).encode("utf-8")).hexdigest()
+        return self.carpeta/"{}.npz".format(nombre)
+
+    # solución guardada para la clave, o None si no está en memoria ni en disco
+    def obtener(self,clave)->tuple:
+        if clave in self._entradas:
+            self._entradas.move_to_end(clave)
+            self.aciertos+=1
+            return self._entradas[clave]
+        archivo=self._archivo(clave)
+        if archivo is not None and archivo.exists():
+            with np.load(archivo) as datos:
+                t,y=datos["t"],datos["y"]
+            self._agregar(clave,t,y)
+            self.aciertos+=1
+            return t,y
+        self.fallos+=1
+        return None
+
+    # guardar una solución; los arreglos quedan de solo lectura
+    def guardar(self,clave,t:np.ndarray,y:np.ndarray)->tuple:
+        self._agregar(clave,t,y)
+        archivo=self._archivo(clave)
+        if archivo is not None:
+            np.savez(archivo,t=t,y=y)
+        return t,y
+
+    def _agregar(self,clave,t:np.ndarray,y:np.ndarray):
+        if clave in self._entradas:
+            self._quitar(clave)
+        t.setflags(write=False)
+        y.setflags(write=False)
+        tamaño=t.nbytes+y.nbytes
+        # una solución más grande que todo el presupuesto no se guarda en memoria
+        if tamaño>self.limite_bytes:
+            return
+        while self._entradas and self.bytes_usados+tamaño>self.limite_bytes:
+            self._quitar(next(iter(self._entradas)))
+        self._entradas[clave]=(t,y)
+        self.bytes_usados+=tamaño
+        escenario=_escenario(clave)
+        if escenario not in self._mas_largas or self._mas_largas[escenario][4]<=clave[4]:
+            self._mas_largas[escenario]=clave
+
+    def _quitar(self,clave):
+        t,y=self._entradas.pop(clave)
+        self.bytes_usados-=t.nbytes+y.nbytes
+        escenario=_escenario(clave)
+        if self._mas_largas.get(escenario)==clave:
+            del self._mas_largas[escenario]
+
+    # vaciar la memoria (los archivos en disco se conservan)
+    def limpiar(self):
+        self._entradas.clear()
+        self._mas_largas.clear()
+        self.bytes_usados=0
+
+    # resolver con un método de METODOS, usando la caché si la solución ya existe
+    # si hay una solución del mismo escenario con otro tf, se recorta (tf menor)
+    # o se continúa desde su último estado (tf mayor) en vez de integrar desde t0
+    def resolver(self,metodo:str,p:Parametros,y0,t0:float=0,tf:float=20,tstep:float=1,progreso=None)->tuple:
+        if metodo not in METODOS:
+            raise ValueError("método desconocido: {}".format(metodo))
+        clave=clave_solucion(metodo,p,y0,t0,tf,tstep)
+        solucion=self.obtener(clave)
+        if solucion is not None:
+            return solucion
+        t=malla_temporal(t0,tf,tstep)
+        # la solución base se busca sin contar aciertos ni fallos: obtener ya contó uno
+        base=self._mas_largas.get(_escenario(clave))
+        anterior=self._entradas.get(base) if base is not None else None
+        if anterior is None:
+            y=integrar_en_malla(metodo,p,y0,t,progreso)
+            return self.guardar(clave,t,y)
+        self._entradas.move_to_end(base)
+        t_base,y_base=anterior
+        if len(t)<=len(t_base):
+            # recortar es un acierto: se corrige el fallo que contó obtener
+            self.fallos-=1
+            self.aciertos+=1
+            return t_base[:len(t)],y_base[:len(t)]
+        # continuar desde el último punto de la solución anterior
+        extension=integrar_en_malla(metodo,p,y_base[-1],t[len(t_base)-1:],progreso)
+        y=np.concatenate((y_base,extension[1:]))
+        self.guardar(clave,t,y)
+        # la base es un prefijo de la nueva solución; se descarta solo si la nueva quedó guardada
+        if clave in self._entradas and base in self._entradas:
+            self._quitar(base)
+        return t,y
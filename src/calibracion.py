@@ -0,0 +1,173 @@
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+import numpy as np
+from modelo import Parametros, ORDEN_PARAMETROS, ORDEN_COMPARTIMIENTOS
+from sensibilidad import integrar_sensibilidades
+from escenarios import AlmacenEscenarios, Escenario
+
+# calibración de parámetros contra una serie observada de un compartimiento (I o L)
+# mínimos cuadrados con gradientes de las sensibilidades hacia adelante, varios puntos
+# de inicio en un grupo de procesos y abandono temprano de los inicios que no mejoran
+
+# límites por defecto de los parámetros que son proporciones
+LIMITES_PROPORCIONES={"δ":(0.0,1.0),"ρ":(0.0,1.0),"r1":(0.0,1.0),"r2":(0.0,1.0)}
+
+
+@dataclass
+class InicioCalibracion:
+    x0:np.ndarray           # valores iniciales de los parámetros libres
+    x:np.ndarray            # valores finales
+    costo:float             # 0.5 * suma de residuos al cuadrado
+    nfev:int                # integraciones del modelo
+    estado:str              # "convergio", "abandonado" o "fallo"
+
+
+@dataclass
+class ResultadoCalibracion:
+    parametros:Parametros   # parámetros completos con los libres ajustados
+    libres:tuple            # nombres de los parámetros ajustados
+    costo:float
+    inicios:list            # InicioCalibracion de cada punto de inicio
+
+
+# problema de calibración (se envía a los procesos, debe poder serializarse)
+@dataclass
+class ProblemaCalibracion:
+    base:Parametros         # valores de los parámetros fijos
+    y0:tuple                # estado inicial en t0
+    t0:float
+    t_obs:np.ndarray        # tiempos observados
+    observados:np.ndarray   # valores observados
+    compartimiento:str      # "I" o "L"
+    libres:tuple            # parámetros a ajustar
+
+    def parametros(self,x)->Parametros:
+        return replace(self.base,**dict(zip(self.libres,(float(v) for v in x))))
+
+    # residuos y su jacobiano respecto a los parámetros libres
+    def evaluar(self,x)->tuple:
+        malla=self.t_obs if self.t_obs[0]==self.t0 else np.concatenate(([self.t0],self.t_obs))
+        solucion=integrar_sensibilidades(self.parametros(x),self.y0,malla)
+        desde=len(malla)-len(self.t_obs)
+        i=ORDEN_COMPARTIMIENTOS.index(self.compartimiento)
+        columnas=[ORDEN_PARAMETROS.index(nombre) for nombre in self.libres]
+        residuos=solucion.y[desde:,i]-self.observados
+        return residuos,solucion.sensibilidades[desde:,i][:,columnas]
+
+
+# mejor costo encontrado por cualquier inicio (compartido entre procesos)
+_mejor_global=None
+
+def _iniciar_trabajador(mejor_global):
+    global _mejor_global
+    _mejor_global=mejor_global
+
+
+class _Abandonar(Exception):
+    pass
+
+
+# ajustar desde un punto de inicio; abandona si después de min_evaluaciones integraciones
+# el costo sigue por encima de factor_abandono veces el mejor costo global
+def _ajustar_inicio(problema:ProblemaCalibracion,x0,limites,min_evaluaciones:int,factor_abandono:float,max_evaluaciones:int)->InicioCalibracion:
+    from scipy.optimize import least_squares
+    estado={"x":np.array(x0,dtype=float),"costo":math.inf,"nfev":0,"ultimo":None}
+
+    def evaluar(x):
+        if estado["ultimo"] is not None and np.array_equal(estado["ultimo"][0],x):
+            return estado["ultimo"][1]
+        residuos,jac=problema.evaluar(x)
+        if not np.all(np.isfinite(residuos)) or not np.all(np.isfinite(jac)):
+            raise FloatingPointError("solución no finita")
+        estado["nfev"]+=1
+        estado["ultimo"]=(np.array(x),(residuos,jac))
+        costo=0.5*float(residuos@residuos)
+        if costo<estado["costo"]:
+            estado["costo"]=costo
+            estado["x"]=np.array(x)
+            with _mejor_global.get_lock():
+                if costo<_mejor_global.value:
+                    _mejor_global.value=costo
+        elif estado["nfev"]>=min_evaluaciones and estado["costo"]>factor_abandono*_mejor_global.value:
+            raise _Abandonar()
+        return residuos,jac
+
+    try:
+        with np.errstate(all="ignore"):
+            resultado=least_squares(lambda x:evaluar(x)[0],x0,jac=lambda x:evaluar(x)[1],bounds=limites,
+                                    x_scale="jac",max_nfev=max_evaluaciones)
+        return InicioCalibracion(np.array(x0),resultado.x,float(resultado.cost),estado["nfev"],"convergio")
+    except _Abandonar:
+        return InicioCalibracion(np.array(x0),estado["x"],estado["costo"],estado["nfev"],"abandonado")
+    except (RuntimeError,FloatingPointError,ValueError):
+        return InicioCalibracion(np.array(x0),estado["x"],estado["costo"],estado["nfev"],"fallo")
+
+
+# puntos de inicio: uniformes en límites finitos, log-uniformes entre base/10 y base*10 si no
+def puntos_de_inicio(base:Parametros,libres:tuple,limites:tuple,inicios:int,semilla:int=None)->np.ndarray:
+    generador=np.random.default_rng(semilla)
+    puntos=np.empty((inicios,len(libres)))
+    for j,nombre in enumerate(libres):
+        inferior,superior=limites[0][j],limites[1][j]
+        valor=getattr(base,nombre)
+        if np.isfinite(inferior) and np.isfinite(superior):
+            puntos[:,j]=generador.uniform(inferior,superior,inicios)
+        elif valor>0:
+            puntos[:,j]=np.clip(valor*10**generador.uniform(-1,1,inicios),inferior,superior)
+        else:
+            puntos[:,j]=np.clip(generador.uniform(0,1,inicios),inferior,superior)
+    # el primer inicio es el valor actual de los parámetros
+    puntos[0]=np.clip([getattr(base,nombre) for nombre in libres],limites[0],limites[1])
+    return puntos
+
+
+# calibrar los parámetros libres para que el compartimiento siga la serie observada
+def calibrar(base:Parametros,y0,t_obs,observados,compartimiento:str="I",libres=("β","ρ","φ","γ"),t0:float=None,
+             limites:dict=None,inicios:int=8,trabajadores:int=None,semilla:int=None,
+             min_evaluaciones:int=5,factor_abandono:float=10.0,max_evaluaciones:int=100)->ResultadoCalibracion:
+    if compartimiento not in ORDEN_COMPARTIMIENTOS:
+        raise ValueError("compartimiento desconocido: {}".format(compartimiento))
+    desconocidos=[nombre for nombre in libres if nombre not in ORDEN_PARAMETROS]
+    if desconocidos:
+        raise ValueError("parámetros desconocidos: {}".format(", ".join(desconocidos)))
+    t_obs=np.asarray(t_obs,dtype=float)
+    observados=np.asarray(observados,dtype=float)
+    if t_obs.shape!=observados.shape or t_obs.ndim!=1 or len(t_obs)<len(libres):
+        raise ValueError("se necesitan al menos {} observaciones con tiempos y valores de la misma forma".format(len(libres)))
+    if np.any(np.diff(t_obs)<=0):
+        raise ValueError("los tiempos observados deben ser crecientes")
+    t0=float(t_obs[0]) if t0 is None else float(t0)
+    if t0>t_obs[0]:
+        raise ValueError("t0 debe ser anterior a la primera observación")
+    libres=tuple(libres)
+    limites=dict(limites or {})
+    inferiores=np.array([limites.get(nombre,LIMITES_PROPORCIONES.get(nombre,(0.0,np.inf)))[0] for nombre in libres],dtype=float)
+    superiores=np.array([limites.get(nombre,LIMITES_PROPORCIONES.get(nombre,(0.0,np.inf)))[1] for nombre in libres],dtype=float)
+    problema=ProblemaCalibracion(base,tuple(float(v) for v in y0),t0,t_obs,observados,compartimiento,libres)
+    puntos=puntos_de_inicio(base,libres,(inferiores,superiores),inicios,semilla)
+    argumentos=[(problema,x0,(inferiores,superiores),min_evaluaciones,factor_abandono,max_evaluaciones) for x0 in puntos]
+
+    mejor_global=multiprocessing.Value("d",math.inf)
+    trabajadores=trabajadores or min(inicios,os.cpu_count() or 1)
+    if trabajadores==1:
+        _iniciar_trabajador(mejor_global)
+        resultados=[_ajustar_inicio(*args) for args in argumentos]
+    else:
+        with ProcessPoolExecutor(max_workers=trabajadores,initializer=_iniciar_trabajador,initargs=(mejor_global,)) as ejecutor:
+            resultados=list(ejecutor.map(_ajustar_inicio,*zip(*argumentos)))
+
+    validos=[r for r in resultados if np.isfinite(r.costo)]
+    if not validos:
+        raise RuntimeError("ningún punto de inicio produjo una solución válida")
+    mejor=min(validos,key=lambda r:r.costo)
+    return ResultadoCalibracion(problema.parametros(mejor.x),libres,mejor.costo,resultados)
+
+
+# guardar los parámetros ajustados como escenario (misma ruta que save_data)
+def guardar_calibracion(archivo,nombre:str,resultado:ResultadoCalibracion,y0,t0:float=0,tf:float=20,tstep:float=1):
+    with AlmacenEscenarios(archivo) as almacen:
+        almacen.agregar(Escenario(nombre,resultado.parametros,tuple(float(v) for v in y0),t0,tf,tstep))
+    return
@@ -0,0 +1,223 @@
+import csv
+import json
+import os
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+import numpy as np
+from modelo import Parametros, ORDEN_PARAMETROS, ORDEN_COMPARTIMIENTOS
+from metodos import METODOS, integrar_en_malla, malla_temporal
+from escenarios import AlmacenEscenarios, Escenario
+from resumenes import Pico, InfeccionesAcumuladas, Integral, Final, resumir
+from equilibrio import largo_plazo
+
+# ejecución por lotes sin interfaz gráfica
+# lee escenarios de un archivo JSON, CSV o del almacén binario de escenarios, los resuelve
+# en varios procesos y escribe trayectorias y métricas de resumen en .npz o .csv
+#
+# uso: python consola.py escenarios.json [--trabajadores 8] [--salida r.npz] [--resumen m.csv]
+#
+# JSON: lista de objetos {"nombre", "parametros", "iniciales", "t0", "tf", "tstep", "metodo"}
+#   con parametros como objeto por nombre o lista de 12 valores e iniciales como [S, E, I, L]
+# CSV: una fila por escenario con columnas nombre, los 12 parámetros, S0, E0, I0, L0,
+#   t0, tf, tstep y metodo
+# los parámetros también se aceptan con nombres sin letras griegas (Lambda, beta, ...)
+# "largo_plazo": true (o tf = inf) pide los valores de largo plazo: se calculan con
+# equilibrio.largo_plazo en forma cerrada, sin integrar ni escribir trayectoria
+# código de salida: 0 si todo se resolvió, 1 si el archivo no existe, no se puede leer o
+# no tiene escenarios, o si algún escenario falló. El archivo de entrada nunca se modifica.
+
+ALIAS={"Lambda":"Λ","beta":"β","delta":"δ","rho":"ρ","mu":"μ","phi":"φ","gamma":"γ"}
+METODO_POR_DEFECTO="runge_kutta_4"
+
+
+@dataclass
+class Corrida:
+    escenario:Escenario
+    metodo:str=METODO_POR_DEFECTO
+    largo_plazo:bool=False
+
+
+# resúmenes calculados para cada escenario
+def resumenes_por_defecto()->list:
+    return [Pico("I"),InfeccionesAcumuladas(),Integral("L"),Final()]
+
+
+def _parametros(valores)->Parametros:
+    if isinstance(valores,dict):
+        return Parametros.desde_diccionario({ALIAS.get(nombre,nombre):valor for nombre,valor in valores.items()})
+    return Parametros.desde_arreglo(valores)
+
+# verdadero desde JSON (true) o CSV ("1", "true", "si")
+def _booleano(valor)->bool:
+    if isinstance(valor,str):
+        return valor.strip().lower() in ("1","true","si","sí","verdadero")
+    return bool(valor)
+
+def _iniciales(valores)->tuple:
+    if isinstance(valores,dict):
+        valores=[valores[nombre] for nombre in ORDEN_COMPARTIMIENTOS]
+    if len(valores)!=len(ORDEN_COMPARTIMIENTOS):
+        raise ValueError("se esperaban {} condiciones iniciales".format(len(ORDEN_COMPARTIMIENTOS)))
+    return tuple(float(x) for x in valores)
+
+# corrida desde un objeto JSON o una fila CSV (todas las columnas al mismo nivel)
+def corrida_desde_diccionario(datos:dict,i:int=0)->Corrida:
+    datos={ALIAS.get(nombre,nombre):valor for nombre,valor in datos.items()}
+    parametros=_parametros(datos["parametros"] if "parametros" in datos else {nombre:datos.get(nombre) for nombre in ORDEN_PARAMETROS})
+    iniciales=_iniciales(datos["iniciales"] if "iniciales" in datos else [datos.get("{}0".format(nombre),0) for nombre in ORDEN_COMPARTIMIENTOS])
+    metodo=datos.get("metodo") or METODO_POR_DEFECTO
+    if metodo not in METODOS:
+        raise ValueError("método desconocido en el escenario {}: {}".format(i,metodo))
+    escenario=Escenario(datos.get("nombre") or "escenario_{}".format(i),parametros,iniciales,
+                        float(datos.get("t0",0)),float(datos.get("tf",20)),float(datos.get("tstep",1)))
+    return Corrida(escenario,metodo,_booleano(datos.get("largo_plazo",False)) or escenario.tf==np.inf)
+
+
+# leer las corridas de un archivo .json, .csv o del almacén binario de escenarios
+# el archivo debe existir y tener escenarios; el almacén se abre solo para lectura y un
+# archivo sin el encabezado "SEIL" (p. ej. un save.bin antiguo) se rechaza con ValueError
+def leer_corridas(archivo)->list:
+    archivo=Path(archivo)
+    if not archivo.is_file():
+        raise FileNotFoundError("no existe el archivo de escenarios {}".format(archivo))
+    if archivo.suffix.lower()==".json":
+        with open(archivo,encoding="utf-8") as entrada:
+            datos=json.load(entrada)
+        if isinstance(datos,dict):
+            datos=datos.get("escenarios",[datos])
+        corridas=[corrida_desde_diccionario(fila,i) for i,fila in enumerate(datos)]
+    elif archivo.suffix.lower()==".csv":
+        with open(archivo,encoding="utf-8",newline="") as entrada:
+            corridas=[corrida_desde_diccionario({nombre:valor for nombre,valor in fila.items() if valor not in ("",None)},i)
+                      for i,fila in enumerate(csv.DictReader(entrada))]
+    else:
+        with AlmacenEscenarios(archivo,solo_lectura=True) as almacen:
+            corridas=[Corrida(almacen.obtener(nombre)) for nombre in almacen.nombres()]
+    if not corridas:
+        raise ValueError("{} no tiene escenarios".format(archivo))
+    return corridas
+
+
+# valores de largo plazo de un escenario como resumen (S_largo_plazo, ...)
+def resumen_largo_plazo(p:Parametros)->dict:
+    return {"{}_largo_plazo".format(nombre):float(valor) for nombre,valor in zip(ORDEN_COMPARTIMIENTOS,largo_plazo(p))}
+
+
+# resolver una corrida; con trayectoria=False la solución se recorre por bloques y
+# solo se guardan los resúmenes; una corrida de largo plazo no se integra
+def ejecutar_corrida(corrida:Corrida,trayectoria:bool=True)->dict:
+    escenario=corrida.escenario
+    resultado={"nombre":escenario.nombre,"metodo":corrida.metodo,"t":None,"y":None,"resumen":{},"error":""}
+    resumenes=resumenes_por_defecto()
+    try:
+        with np.errstate(all="ignore"):
+            if corrida.largo_plazo:
+                resultado["metodo"]="largo_plazo"
+                resultado["resumen"]=resumen_largo_plazo(escenario.parametros)
+            elif trayectoria:
+                t=malla_temporal(escenario.t0,escenario.tf,escenario.tstep)
+                y=integrar_en_malla(corrida.metodo,escenario.parametros,escenario.iniciales,t)
+                for resumen in resumenes:
+                    resumen.iniciar(escenario.parametros)
+                    resumen.actualizar(t,y)
+                resultado["t"]=t
+                resultado["y"]=y
+                resultado["resumen"]={nombre:valor for resumen in resumenes for nombre,valor in resumen.valores().items()}
+            else:
+                resultado["resumen"]=resumir(corrida.metodo,escenario.parametros,escenario.iniciales,resumenes,
+                                             escenario.t0,escenario.tf,escenario.tstep)
+    except (ValueError,RuntimeError,FloatingPointError) as error:
+        resultado["error"]=str(error)
+    return resultado
+
+
+# resolver todas las corridas en trabajadores procesos (1 = en este proceso)
+def ejecutar_lote(corridas:list,trabajadores:int=1,trayectorias:bool=True)->list:
+    if trabajadores<=1 or len(corridas)<=1:
+        return [ejecutar_corrida(corrida,trayectorias) for corrida in corridas]
+    # multiprocessing tarda en importarse; solo se carga si hay más de un trabajador
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=trabajadores) as ejecutor:
+        return list(ejecutor.map(ejecutar_corrida,corridas,[trayectorias]*len(corridas),
+                                 chunksize=max(1,len(corridas)//(4*trabajadores))))
+
+
+# trayectorias en .npz (nombres, t_i, y_i) o .csv (nombre, t, S, E, I, L)
+def escribir_trayectorias(archivo,resultados:list):
+    archivo=Path(archivo)
+    validos=[r for r in resultados if r["y"] is not None]
+    if archivo.suffix.lower()==".npz":
+        arreglos={"nombres":np.array([r["nombre"] for r in validos])}
+        for i,resultado in enumerate(validos):
+            arreglos["t_{}".format(i)]=resultado["t"]
+            arreglos["y_{}".format(i)]=resultado["y"]
+        np.savez_compressed(archivo,**arreglos)
+        return
+    with open(archivo,"w",encoding="utf-8",newline="") as salida:
+        escritor=csv.writer(salida)
+        escritor.writerow(("nombre","t")+ORDEN_COMPARTIMIENTOS)
+        for resultado in validos:
+            for t,fila in zip(resultado["t"].tolist(),resultado["y"].tolist()):
+                escritor.writerow([resultado["nombre"],repr(t)]+[repr(x) for x in fila])
+    return
+
+
+# métricas de resumen en .npz (un arreglo por métrica) o .csv (una fila por escenario)
+def escribir_resumen(archivo,resultados:list):
+    archivo=Path(archivo)
+    metricas=[]
+    for resultado in resultados:
+        metricas.extend(nombre for nombre in resultado["resumen"] if nombre not in metricas)
+    if archivo.suffix.lower()==".npz":
+        arreglos={"nombres":np.array([r["nombre"] for r in resultados]),
+                  "metodos":np.array([r["metodo"] for r in resultados]),
+                  "errores":np.array([r["error"] for r in resultados])}
+        for metrica in metricas:
+            arreglos[metrica]=np.array([r["resumen"].get(metrica,np.nan) for r in resultados],dtype=float)
+        np.savez(archivo,**arreglos)
+        return
+    with open(archivo,"w",encoding="utf-8",newline="") as salida:
+        escritor=csv.writer(salida)
+        escritor.writerow(["nombre","metodo"]+metricas+["error"])
+        for resultado in resultados:
+            escritor.writerow([resultado["nombre"],resultado["metodo"]]+[repr(float(resultado["resumen"].get(metrica,np.nan))) for metrica in metricas]+[resultado["error"]])
+    return
+
+
+def main(argumentos=None)->int:
+    # argparse solo hace falta desde la línea de comandos, no al importar el módulo (servidor.py)
+    import argparse
+    parser=argparse.ArgumentParser(description="Ejecución por lotes de escenarios SEIL sin interfaz gráfica")
+    parser.add_argument("escenarios",help="archivo .json, .csv o almacén binario de escenarios")
+    parser.add_argument("--trabajadores",type=int,default=os.cpu_count() or 1,help="procesos (por defecto uno por núcleo)")
+    parser.add_argument("--salida",help="archivo .npz o .csv para las trayectorias")
+    parser.add_argument("--resumen",help="archivo .npz o .csv para las métricas de resumen")
+    parser.add_argument("--metodo",choices=list(METODOS),help="usar este método en todos los escenarios")
+    parser.add_argument("--largo-plazo",action="store_true",help="calcular los valores de largo plazo sin integrar")
+    args=parser.parse_args(argumentos)
+
+    try:
+        corridas=leer_corridas(args.escenarios)
+    except (OSError,KeyError,TypeError,ValueError) as error:
+        print("error al leer {}: {}".format(args.escenarios,error),file=sys.stderr)
+        return 1
+    if args.metodo:
+        corridas=[Corrida(corrida.escenario,args.metodo,corrida.largo_plazo) for corrida in corridas]
+    if args.largo_plazo:
+        corridas=[Corrida(corrida.escenario,corrida.metodo,True) for corrida in corridas]
+    # sin --salida no hace falta guardar las trayectorias
+    resultados=ejecutar_lote(corridas,args.trabajadores,trayectorias=args.salida is not None)
+    if args.salida:
+        escribir_trayectorias(args.salida,resultados)
+    if args.resumen:
+        escribir_resumen(args.resumen,resultados)
+    fallidos=[r for r in resultados if r["error"]]
+    for resultado in fallidos:
+        print("error en {}: {}".format(resultado["nombre"],resultado["error"]),file=sys.stderr)
+    print("{} escenarios resueltos, {} con error".format(len(resultados)-len(fallidos),len(fallidos)))
+    return 1 if fallidos else 0
+
+
+if __name__=="__main__":
+    sys.exit(main())
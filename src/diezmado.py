@@ -0,0 +1,70 @@
+import numpy as np
+
+# reducción de puntos para graficar trayectorias muy largas
+# M4 conserva el primero, el último, el mínimo y el máximo de cada columna de píxeles,
+# así que picos como el máximo de infectados siguen apareciendo en la gráfica;
+# LTTB elige el punto que forma el triángulo más grande con sus vecinos
+
+
+# índices M4 de una serie y para un ancho en píxeles
+# supone una malla uniforme: cada píxel corresponde al mismo número de puntos
+def indices_m4(y:np.ndarray,ancho:int)->np.ndarray:
+    n=len(y)
+    if ancho<1 or n<=4*ancho:
+        return np.arange(n)
+    k=-(-n//ancho)          # puntos por píxel
+    m=-(-n//k)              # píxeles ocupados
+    grupos=np.pad(y,(0,m*k-n),mode="edge").reshape(m,k)
+    inicio=np.arange(m)*k
+    minimos=np.minimum(inicio+np.argmin(grupos,axis=1),n-1)
+    maximos=np.minimum(inicio+np.argmax(grupos,axis=1),n-1)
+    ultimos=np.minimum(inicio+k-1,n-1)
+    return np.unique(np.concatenate((inicio,minimos,maximos,ultimos)))
+
+def m4(t:np.ndarray,y:np.ndarray,ancho:int)->tuple:
+    indices=indices_m4(y,ancho)
+    return t[indices],y[indices]
+
+
+# índices LTTB (largest triangle three buckets) con a lo sumo umbral puntos
+def indices_lttb(t:np.ndarray,y:np.ndarray,umbral:int)->np.ndarray:
+    n=len(y)
+    if umbral>=n or umbral<3:
+        return np.arange(n)
+    cada=(n-2)/(umbral-2)
+    indices=np.empty(umbral,dtype=np.int64)
+    indices[0]=0
+    indices[-1]=n-1
+    a=0
+    for i in range(umbral-2):
+        inicio=int(i*cada)+1
+        fin=min(int((i+1)*cada)+1,n-1)
+        # promedio del siguiente grupo (o el último punto)
+        siguiente_fin=min(int((i+2)*cada)+1,n)
+        if fin<siguiente_fin:
+            t_medio=t[fin:siguiente_fin].mean()
+            y_medio=y[fin:siguiente_fin].mean()
+        else:
+            t_medio=t[-1]
+            y_medio=y[-1]
+        areas=np.abs((t[a]-t_medio)*(y[inicio:fin]-y[a])-(t[a]-t[inicio:fin])*(y_medio-y[a]))
+        a=inicio+int(np.argmax(areas))
+        indices[i+1]=a
+    return indices
+
+def lttb(t:np.ndarray,y:np.ndarray,umbral:int)->tuple:
+    indices=indices_lttb(t,y,umbral)
+    return t[indices],y[indices]
+
+
+# recortar al rango visible [t_min, t_max] (incluye un punto a cada lado) y diezmar
+def diezmar(t:np.ndarray,y:np.ndarray,ancho:int,t_min:float=None,t_max:float=None,metodo:str="m4")->tuple:
+    inicio=0 if t_min is None else max(int(np.searchsorted(t,t_min,side="left"))-1,0)
+    fin=len(t) if t_max is None else min(int(np.searchsorted(t,t_max,side="right"))+1,len(t))
+    t=t[inicio:fin]
+    y=y[inicio:fin]
+    if metodo=="m4":
+        return m4(t,y,ancho)
+    if metodo=="lttb":
+        return lttb(t,y,4*ancho)
+    raise ValueError("método de diezmado desconocido: {}".format(metodo))
@@ -0,0 +1,113 @@
+from dataclasses import dataclass
+import numpy as np
+from modelo import Parametros, jacobiano
+
+# equilibrios del modelo SEIL en forma cerrada
+#
+# con I, L ≠ 0 las ecuaciones de L y E dan
+#   L = φ(1-r2)/(μ-d2+γ) I,   E = ((1-ρ) βS(I+δL) + r2 I)/(μ+k(1-r1))
+# y la de I fija S*; la de S fija el nivel de I*.
+#
+# en el modelo tal como está escrito, S no tiene muerte natural (dS = Λ - βS(I+δL) - μL),
+# así que con Λ > 0 no existe equilibrio libre de enfermedad: sin infectados S crece
+# como Λ t. Por eso el número reproductivo se da en función de la población susceptible
+# S de referencia, R(S) = S/S*, y el equilibrio libre de enfermedad (S, 0, 0, 0) solo es
+# equilibrio si Λ = 0. Los parámetros pueden ser escalares o arreglos (un valor por escenario).
+
+
+@dataclass
+class Estabilidad:
+    autovalores:np.ndarray      # autovalores del jacobiano, forma (..., 4)
+    estable:np.ndarray          # True si todas las partes reales son negativas
+
+
+def _salidas(p:Parametros)->tuple:
+    salida_E=p.μ+p.k*(1-p.r1)
+    salida_I=p.μ+p.d1+p.φ*(1-p.r2)+p.r2
+    salida_L=p.μ-p.d2+p.γ
+    return salida_E,salida_I,salida_L
+
+
+# matrices F (nuevas infecciones) y V (transiciones) de la matriz de siguiente generación
+# en los compartimientos infectados E, I, L, evaluadas con susceptibles S; forma (..., 3, 3)
+def matrices_siguiente_generacion(p:Parametros,S=1.0)->tuple:
+    salida_E,salida_I,salida_L=_salidas(p)
+    forma=np.broadcast(np.asarray(S),*[np.asarray(x) for x in p]).shape
+    F=np.zeros(forma+(3,3))
+    F[...,0,1]=p.β*(1-p.ρ)*S
+    F[...,0,2]=p.β*(1-p.ρ)*p.δ*S
+    F[...,1,1]=p.β*p.ρ*S
+    F[...,1,2]=p.β*p.ρ*p.δ*S
+    V=np.zeros(forma+(3,3))
+    V[...,0,0]=salida_E
+    V[...,0,1]=-p.r2
+    V[...,1,0]=-p.k*(1-p.r1)
+    V[...,1,1]=salida_I
+    V[...,1,2]=-p.γ
+    V[...,2,1]=-p.φ*(1-p.r2)
+    V[...,2,2]=salida_L
+    return F,V
+
+
+# número reproductivo: radio espectral de F V^-1 con S susceptibles
+def numero_reproductivo(p:Parametros,S=1.0):
+    F,V=matrices_siguiente_generacion(p,S)
+    with np.errstate(all="ignore"):
+        radio=np.max(np.abs(np.linalg.eigvals(F@np.linalg.inv(V))),axis=-1)
+    return float(radio) if np.ndim(radio)==0 else radio
+
+
+# equilibrio libre de enfermedad (S, 0, 0, 0); nan si Λ ≠ 0 (no es equilibrio)
+def equilibrio_libre(p:Parametros,S=1.0)->np.ndarray:
+    forma=np.broadcast(np.asarray(S),np.asarray(p.Λ)).shape
+    y=np.zeros(forma+(4,))
+    y[...,0]=np.where(np.asarray(p.Λ)==0,S,np.nan)
+    return y
+
+
+# susceptibles en el equilibrio endémico: el S para el que R(S) = 1
+def susceptibles_umbral(p:Parametros):
+    salida_E,salida_I,salida_L=_salidas(p)
+    progresion=p.k*(1-p.r1)
+    perdida=p.φ*(1-p.r2)
+    with np.errstate(all="ignore"):
+        contacto=1+p.δ*perdida/salida_L          # (I+δL)/I
+        return (salida_I-p.γ*perdida/salida_L-progresion*p.r2/salida_E)/(p.β*contacto*(p.ρ+progresion*(1-p.ρ)/salida_E))
+
+
+# equilibrio endémico (S*, E*, I*, L*), forma (..., 4); nan donde no existe con
+# todos los compartimientos no negativos e I* > 0
+def equilibrio_endemico(p:Parametros)->np.ndarray:
+    salida_E,salida_I,salida_L=_salidas(p)
+    perdida=p.φ*(1-p.r2)
+    with np.errstate(all="ignore"):
+        S=susceptibles_umbral(p)
+        L_por_I=perdida/salida_L
+        infeccion_por_I=p.β*S*(1+p.δ*L_por_I)
+        I=p.Λ/(infeccion_por_I+p.μ*L_por_I)
+        L=L_por_I*I
+        E=((1-p.ρ)*infeccion_por_I*I+p.r2*I)/salida_E
+        y=np.stack(np.broadcast_arrays(S,E,I,L),axis=-1).astype(float)
+        valido=np.all(np.isfinite(y)&(y>=0),axis=-1)&(y[...,2]>0)&(np.asarray(salida_L)>0)&(np.asarray(salida_E)>0)
+    return np.where(valido[...,None],y,np.nan)
+
+
+# estabilidad local de un equilibrio por los autovalores del jacobiano analítico
+def estabilidad(y:np.ndarray,p:Parametros)->Estabilidad:
+    autovalores=np.linalg.eigvals(jacobiano(np.asarray(y,dtype=float),p))
+    return Estabilidad(autovalores,np.all(autovalores.real<0,axis=-1))
+
+
+# valores de largo plazo sin integrar hasta un tf grande: el equilibrio endémico si
+# existe y es localmente estable; si no, ValueError (la solución no se estabiliza en
+# un equilibrio conocido y hay que integrar)
+def largo_plazo(p:Parametros)->np.ndarray:
+    y=equilibrio_endemico(p)
+    if np.ndim(y)==1:
+        if np.isnan(y).any() or not estabilidad(y,p).estable:
+            raise ValueError("no hay un equilibrio endémico estable para estos parámetros")
+        return y
+    validos=~np.isnan(y).any(axis=-1)
+    estables=np.zeros(validos.shape,dtype=bool)
+    estables[validos]=estabilidad(y[validos],Parametros.desde_arreglo(p.como_arreglo()[validos])).estable
+    return np.where(estables[...,None],y,np.nan)
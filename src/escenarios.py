@@ -0,0 +1,232 @@
+import mmap
+import struct
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+import numpy as np
+from modelo import Parametros, ORDEN_PARAMETROS, ORDEN_COMPARTIMIENTOS
+
+# almacén binario de escenarios con versión, suma de verificación e índice
+#
+# formato (little endian):
+#   encabezado de 16 bytes: "SEIL", versión (uint16), tamaño de registro (uint16),
+#                           cantidad de campos (uint32), crc32 de los 12 bytes anteriores
+#   registros de tamaño fijo: nombre (64 bytes utf-8), 12 parámetros, S0 E0 I0 L0,
+#                             t0, tf, tstep (float64), crc32 del registro, reservado
+#
+# los registros solo se agregan al final; el registro i está en 16 + i*tamaño, así que
+# se leen en O(1) desde un mmap. Si un nombre se guarda varias veces vale el último.
+# Abrir un almacén nunca escribe: el archivo se crea (o el encabezado se escribe en un
+# archivo vacío) al agregar el primer escenario. Un save.bin antiguo con 12 doubles
+# sueltos solo se convierte al llamar a importar_antiguo(); queda como un escenario
+# "importado" que solo tiene parámetros (su estado inicial y su tiempo no son datos guardados).
+
+MAGIA=b"SEIL"
+VERSION=1
+ENCABEZADO=struct.Struct("<4sHHII")
+LARGO_NOMBRE=64
+# nombre del escenario migrado desde un save.bin antiguo
+NOMBRE_IMPORTADO="importado"
+# tamaño del save.bin antiguo: 12 doubles
+LARGO_ANTIGUO=8*len(ORDEN_PARAMETROS)
+REGISTRO=np.dtype([
+    ("nombre","S{}".format(LARGO_NOMBRE)),
+    ("parametros","<f8",(len(ORDEN_PARAMETROS),)),
+    ("iniciales","<f8",(len(ORDEN_COMPARTIMIENTOS),)),
+    ("t0","<f8"),
+    ("tf","<f8"),
+    ("tstep","<f8"),
+    ("crc","<u4"),
+    ("reservado","<u4"),
+])
+# bytes del registro cubiertos por el crc
+_CUBIERTO=REGISTRO.fields["crc"][1]
+
+
+# escenario guardado: parámetros, estado inicial y tiempo de simulación
+@dataclass(frozen=True)
+class Escenario:
+    nombre:str
+    parametros:Parametros
+    iniciales:tuple
+    t0:float=0
+    tf:float=20
+    tstep:float=1
+
+
+def _encabezado()->bytes:
+    datos=ENCABEZADO.pack(MAGIA,VERSION,REGISTRO.itemsize,len(REGISTRO.names),0)[:-4]
+    return datos+struct.pack("<I",zlib.crc32(datos))
+
+def _codificar_nombre(nombre:str)->bytes:
+    codificado=nombre.encode("utf-8")
+    if len(codificado)>LARGO_NOMBRE:
+        raise ValueError("el nombre del escenario supera {} bytes".format(LARGO_NOMBRE))
+    return codificado
+
+# registros listos para escribir, con su crc
+def _empaquetar(escenarios:list)->bytes:
+    registros=np.zeros(len(escenarios),dtype=REGISTRO)
+    registros["nombre"]=[_codificar_nombre(escenario.nombre) for escenario in escenarios]
+    registros["parametros"]=[tuple(escenario.parametros) for escenario in escenarios]
+    registros["iniciales"]=[escenario.iniciales for escenario in escenarios]
+    registros["t0"]=[escenario.t0 for escenario in escenarios]
+    registros["tf"]=[escenario.tf for escenario in escenarios]
+    registros["tstep"]=[escenario.tstep for escenario in escenarios]
+    crudo=registros.view(np.uint8).reshape(len(escenarios),REGISTRO.itemsize)
+    registros["crc"]=[zlib.crc32(fila[:_CUBIERTO]) for fila in crudo]
+    return registros.tobytes()
+
+def _desempaquetar(registro)->Escenario:
+    return Escenario(bytes(registro["nombre"]).decode("utf-8"),
+                     Parametros.desde_arreglo(registro["parametros"]),
+                     tuple(float(x) for x in registro["iniciales"]),
+                     float(registro["t0"]),float(registro["tf"]),float(registro["tstep"]))
+
+
+class AlmacenEscenarios:
+    # con solo_lectura=True el archivo debe existir y agregar falla
+    def __init__(self,archivo:Path,solo_lectura:bool=False):
+        self.archivo=Path(archivo)
+        self.solo_lectura=solo_lectura
+        self._mapa=None
+        self._registros=None
+        self._indice=None
+
+    # convertir un save.bin antiguo (12 doubles sueltos) al formato con encabezado
+    # devuelve True si el archivo se convirtió; un almacén válido, vacío o inexistente no se toca
+    def importar_antiguo(self)->bool:
+        if self.solo_lectura:
+            raise ValueError("{} está abierto solo para lectura".format(self.archivo))
+        if not self.archivo.exists() or self.archivo.stat().st_size!=LARGO_ANTIGUO:
+            return False
+        datos=self.archivo.read_bytes()
+        if datos[:len(MAGIA)]==MAGIA:
+            return False
+        parametros=Parametros(*struct.unpack("<"+"d"*len(ORDEN_PARAMETROS),datos))
+        self.cerrar()
+        self._indice=None
+        self.archivo.write_bytes(_encabezado()+_empaquetar([Escenario(NOMBRE_IMPORTADO,parametros,(0.0,)*len(ORDEN_COMPARTIMIENTOS))]))
+        return True
+
+    # tamaño del archivo después de verificar su encabezado; 0 si no existe o está vacío
+    # (un archivo inexistente es un error solo para lectura)
+    # solo se lee el encabezado, no el archivo completo
+    def _verificar(self)->int:
+        if not self.archivo.exists():
+            if self.solo_lectura:
+                raise FileNotFoundError("no existe el almacén de escenarios {}".format(self.archivo))
+            return 0
+        tamaño=self.archivo.stat().st_size
+        if tamaño==0:
+            return 0
+        with open(self.archivo,"rb") as archivo:
+            datos=archivo.read(ENCABEZADO.size)
+        if datos[:len(MAGIA)]!=MAGIA:
+            raise ValueError("{} no es un archivo de escenarios válido".format(self.archivo))
+        self._verificar_encabezado(datos)
+        return tamaño
+
+    def _verificar_encabezado(self,datos:bytes):
+        if len(datos)<ENCABEZADO.size:
+            raise ValueError("encabezado incompleto en {}".format(self.archivo))
+        magia,version,tamaño,campos,crc=ENCABEZADO.unpack(datos)
+        if zlib.crc32(datos[:-4])!=crc:
+            raise ValueError("suma de verificación del encabezado incorrecta en {}".format(self.archivo))
+        if version!=VERSION or tamaño!=REGISTRO.itemsize or campos!=len(REGISTRO.names):
+            raise ValueError("versión de archivo de escenarios no soportada: {}".format(version))
+
+    # registros mapeados en memoria (se vuelven a mapear después de agregar)
+    def _mapear(self):
+        if self._registros is not None:
+            return self._registros
+        tamaño=self._verificar()
+        # un registro incompleto al final (escritura interrumpida) se ignora
+        cantidad=(tamaño-ENCABEZADO.size)//REGISTRO.itemsize
+        if cantidad<=0:
+            self._registros=np.zeros(0,dtype=REGISTRO)
+            return self._registros
+        with open(self.archivo,"rb") as archivo:
+            self._mapa=mmap.mmap(archivo.fileno(),0,access=mmap.ACCESS_READ)
+        self._registros=np.frombuffer(self._mapa,dtype=REGISTRO,count=cantidad,offset=ENCABEZADO.size)
+        return self._registros
+
+    # índice nombre (bytes) -> posición del último registro con ese nombre
+    def _indexar(self)->dict:
+        if self._indice is None:
+            nombres=self._mapear()["nombre"]
+            self._indice=dict(zip(nombres.tolist(),range(len(nombres))))
+        return self._indice
+
+    def __len__(self)->int:
+        return len(self._mapear())
+
+    def __contains__(self,nombre:str)->bool:
+        return nombre.encode("utf-8") in self._indexar()
+
+    # escenario en la posición i, verificando su suma de verificación
+    # el registro se copia fuera del mmap antes de verificarlo: una vista viva en el
+    # traceback impediría cerrar el mapa
+    def __getitem__(self,i:int)->Escenario:
+        cantidad=len(self._mapear())
+        registro=self._mapear()[i].copy()
+        if zlib.crc32(registro.tobytes()[:_CUBIERTO])!=int(registro["crc"]):
+            raise ValueError("el registro {} de {} está dañado".format(i if i>=0 else cantidad+i,self.archivo))
+        return _desempaquetar(registro)
+
+    def nombres(self)->list:
+        return [nombre.decode("utf-8") for nombre in self._indexar()]
+
+    def obtener(self,nombre:str)->Escenario:
+        indice=self._indexar()
+        clave=nombre.encode("utf-8")
+        if clave not in indice:
+            raise KeyError(nombre)
+        return self[indice[clave]]
+
+    # último escenario guardado, o None si el almacén está vacío
+    def ultimo(self)->Escenario:
+        return self[-1] if len(self)>0 else None
+
+    # agregar un escenario al final del archivo
+    def agregar(self,escenario:Escenario):
+        self.agregar_varios([escenario])
+        return
+
+    # agregar varios escenarios con una sola escritura; crea el archivo si hace falta
+    def agregar_varios(self,escenarios):
+        if self.solo_lectura:
+            raise ValueError("{} está abierto solo para lectura".format(self.archivo))
+        escenarios=list(escenarios)
+        posicion=len(self)
+        datos=_empaquetar(escenarios)
+        self.cerrar()
+        if self._verificar()==0:
+            self.archivo.parent.mkdir(parents=True,exist_ok=True)
+            self.archivo.write_bytes(_encabezado())
+        with open(self.archivo,"r+b") as archivo:
+            # descartar un registro incompleto antes de escribir
+            archivo.truncate(ENCABEZADO.size+posicion*REGISTRO.itemsize)
+            archivo.seek(0,2)
+            archivo.write(datos)
+        if self._indice is not None:
+            for i,escenario in enumerate(escenarios):
+                self._indice[escenario.nombre.encode("utf-8")]=posicion+i
+        return
+
+    # liberar el mapa de memoria (se vuelve a abrir al leer); si quedan vistas del mapa
+    # en uso, se cierra cuando se liberan
+    def cerrar(self):
+        self._registros=None
+        if self._mapa is not None:
+            try:
+                self._mapa.close()
+            except BufferError:
+                pass
+            self._mapa=None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*args):
+        self.cerrar()
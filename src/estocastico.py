@@ -0,0 +1,171 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import numpy as np
+from modelo import Parametros, ORDEN_COMPARTIMIENTOS, validar_parametros
+from metodos import malla_temporal
+from paralelo import dividir_bloques
+
+# versión estocástica del modelo SEIL
+# cada término del lado derecho es una reacción con su propensión; las N realizaciones
+# de un ensamble avanzan juntas con sorteos vectorizados de numpy
+#
+# Gillespie (exacto) para poblaciones pequeñas y tau-leaping (Poisson con paso fijo)
+# para poblaciones grandes. Los términos son los del modelo tal como está escrito,
+# incluido -μL en S y +d2 L en L.
+
+# nombre, cambio en (S, E, I, L)
+REACCIONES=(
+    ("reclutamiento",      ( 1, 0, 0, 0)),  # Λ
+    ("infeccion_lenta",    (-1, 1, 0, 0)),  # β(1-ρ) S (I+δL)
+    ("infeccion_rapida",   (-1, 0, 1, 0)),  # βρ S (I+δL)
+    ("salida_S",           (-1, 0, 0, 0)),  # μ L
+    ("muerte_E",           ( 0,-1, 0, 0)),  # μ E
+    ("progresion",         ( 0,-1, 1, 0)),  # k(1-r1) E
+    ("terapia",            ( 0, 1,-1, 0)),  # r2 I
+    ("muerte_I",           ( 0, 0,-1, 0)),  # (μ+d1) I
+    ("perdida",            ( 0, 0,-1, 1)),  # φ(1-r2) I
+    ("retorno",            ( 0, 0, 1,-1)),  # γ L
+    ("muerte_L",           ( 0, 0, 0,-1)),  # μ L
+    ("aumento_L",          ( 0, 0, 0, 1)),  # d2 L
+)
+CAMBIOS=np.array([cambio for _,cambio in REACCIONES],dtype=float)
+# población total por debajo de la cual "auto" usa Gillespie
+UMBRAL_GILLESPIE=1000
+
+
+# propensiones de las reacciones para estados y de forma (..., 4), forma (..., 12)
+def propensiones(y:np.ndarray,p:Parametros)->np.ndarray:
+    S=y[...,0]
+    E=y[...,1]
+    I=y[...,2]
+    L=y[...,3]
+    contacto=p.β*S*(I+p.δ*L)
+    a=np.empty(y.shape[:-1]+(len(REACCIONES),))
+    a[...,0]=p.Λ
+    a[...,1]=(1-p.ρ)*contacto
+    a[...,2]=p.ρ*contacto
+    a[...,3]=p.μ*L
+    a[...,4]=p.μ*E
+    a[...,5]=p.k*(1-p.r1)*E
+    a[...,6]=p.r2*I
+    a[...,7]=(p.μ+p.d1)*I
+    a[...,8]=p.φ*(1-p.r2)*I
+    a[...,9]=p.γ*L
+    a[...,10]=p.μ*L
+    a[...,11]=p.d2*L
+    # una reacción que dejaría un compartimiento negativo no puede ocurrir
+    return np.where(np.any(y[...,None,:]+CAMBIOS<0,axis=-1),0.0,a)
+
+
+@dataclass
+class EnsambleEstocastico:
+    t:np.ndarray            # malla de salida
+    y:np.ndarray            # realizaciones, forma (N, len(t), 4), valores enteros
+
+    def __len__(self)->int:
+        return len(self.y)
+
+    # realizaciones sin infectados (E, I y L en cero) al final; ese estado es absorbente
+    def extinguidas(self)->np.ndarray:
+        return np.all(self.y[:,-1,1:]==0,axis=-1)
+
+    def probabilidad_extincion(self)->float:
+        return float(np.mean(self.extinguidas()))
+
+    # fracción de realizaciones en que el compartimiento llega al umbral
+    def probabilidad_brote(self,umbral:float,compartimiento:str="I")->float:
+        return float(np.mean(np.max(self.y[:,:,ORDEN_COMPARTIMIENTOS.index(compartimiento)],axis=1)>=umbral))
+
+    def media(self)->np.ndarray:
+        return self.y.mean(axis=0)
+
+    def cuantiles(self,q)->np.ndarray:
+        return np.quantile(self.y,q,axis=0)
+
+
+# algoritmo directo de Gillespie para n realizaciones a la vez
+# cada realización tiene su propio tiempo; el estado se registra en la malla t
+def integrar_gillespie(p:Parametros,y0,n:int,t:np.ndarray,generador:np.random.Generator)->np.ndarray:
+    y=np.tile(np.asarray(y0,dtype=float),(n,1))
+    salida=np.empty((n,len(t),len(ORDEN_COMPARTIMIENTOS)),dtype=np.int64)
+    tiempo=np.full(n,float(t[0]))
+    siguiente=np.zeros(n,dtype=np.int64)      # próximo punto de la malla por registrar
+    activos=np.arange(n)
+    while len(activos):
+        a=propensiones(y[activos],p)
+        acumuladas=np.cumsum(a,axis=1)
+        total=acumuladas[:,-1]
+        with np.errstate(divide="ignore"):
+            nuevo=tiempo[activos]+generador.exponential(1.0,len(activos))/total
+        # el estado actual vale hasta el nuevo tiempo: registrar los puntos de la malla que se pasan
+        while True:
+            pendientes=siguiente[activos]<len(t)
+            pendientes[pendientes]=t[siguiente[activos[pendientes]]]<nuevo[pendientes]
+            if not np.any(pendientes):
+                break
+            filas=activos[pendientes]
+            salida[filas,siguiente[filas]]=y[filas]
+            siguiente[filas]+=1
+        sigue=siguiente[activos]<len(t)
+        reaccion=np.minimum(np.sum(acumuladas<(generador.random(len(activos))*total)[:,None],axis=1),len(REACCIONES)-1)
+        activos=activos[sigue]
+        y[activos]+=CAMBIOS[reaccion[sigue]]
+        tiempo[activos]=nuevo[sigue]
+    return salida
+
+
+# tau-leaping: en cada subpaso de largo h cada reacción ocurre Poisson(a h) veces
+# los compartimientos que quedarían negativos se cortan en cero
+def integrar_tau_leaping(p:Parametros,y0,n:int,t:np.ndarray,generador:np.random.Generator,subpasos:int=10)->np.ndarray:
+    y=np.tile(np.asarray(y0,dtype=float),(n,1))
+    salida=np.empty((n,len(t),len(ORDEN_COMPARTIMIENTOS)),dtype=np.int64)
+    salida[:,0]=y
+    for i in range(len(t)-1):
+        h=(t[i+1]-t[i])/subpasos
+        for _ in range(subpasos):
+            y=np.maximum(y+generador.poisson(propensiones(y,p)*h)@CAMBIOS,0)
+        salida[:,i+1]=y
+    return salida
+
+
+def _elegir_metodo(metodo:str,y0)->str:
+    if metodo=="auto":
+        return "gillespie" if np.sum(y0)<=UMBRAL_GILLESPIE else "tau_leaping"
+    if metodo not in ("gillespie","tau_leaping"):
+        raise ValueError("método estocástico desconocido: {}".format(metodo))
+    return metodo
+
+
+# n realizaciones sobre la malla t0:tstep:tf; y0 se redondea a enteros
+def ensamble(p:Parametros,y0,n:int,t0:float=0,tf:float=20,tstep:float=1,metodo:str="auto",semilla=None,subpasos:int=10)->EnsambleEstocastico:
+    validar_parametros(p)
+    y0=np.rint(np.asarray(y0,dtype=float))
+    metodo=_elegir_metodo(metodo,y0)
+    t=malla_temporal(t0,tf,tstep)
+    generador=np.random.default_rng(semilla)
+    if metodo=="gillespie":
+        return EnsambleEstocastico(t,integrar_gillespie(p,y0,n,t,generador))
+    return EnsambleEstocastico(t,integrar_tau_leaping(p,y0,n,t,generador,subpasos))
+
+
+def _ensamble_fragmento(p:Parametros,y0,n:int,t0:float,tf:float,tstep:float,metodo:str,semilla,subpasos:int)->np.ndarray:
+    return ensamble(p,y0,n,t0,tf,tstep,metodo,semilla,subpasos).y
+
+
+# ensamble repartido en fragmentos entre procesos; cada fragmento usa una semilla
+# independiente derivada de semilla, así que el resultado es reproducible para el
+# mismo tamaño de fragmento (no coincide con ensamble() en un solo proceso)
+def ensamble_paralelo(p:Parametros,y0,n:int,t0:float=0,tf:float=20,tstep:float=1,metodo:str="auto",semilla=None,
+                      subpasos:int=10,trabajadores:int=None,tam_fragmento:int=None)->EnsambleEstocastico:
+    validar_parametros(p)
+    trabajadores=trabajadores or os.cpu_count() or 1
+    if tam_fragmento is None:
+        tam_fragmento=max(1,-(-n//trabajadores))
+    fragmentos=dividir_bloques(n,tam_fragmento)
+    semillas=np.random.SeedSequence(semilla).spawn(len(fragmentos))
+    with ProcessPoolExecutor(max_workers=trabajadores) as ejecutor:
+        tareas=[ejecutor.submit(_ensamble_fragmento,p,y0,fin-inicio,t0,tf,tstep,metodo,semilla_fragmento,subpasos)
+                for (inicio,fin),semilla_fragmento in zip(fragmentos,semillas)]
+        y=np.concatenate([tarea.result() for tarea in tareas])
+    return EnsambleEstocastico(malla_temporal(t0,tf,tstep),y)
@@ -0,0 +1,160 @@
+import struct
+import zlib
+from pathlib import Path
+import numpy as np
+from modelo import ORDEN_COMPARTIMIENTOS
+
+# exportación de trayectorias en formato columnar
+#
+# formato (little endian):
+#   encabezado de 64 bytes: "SEILTRAY", versión (uint16), tipo (0=float64, 1=float32),
+#       compresión (0=ninguna, 1=zlib con bytes reordenados), tamaño de bloque (uint32), puntos (uint64),
+#       t0, tstep (float64), posición del directorio (uint64), crc32 de lo anterior
+#   columnas S, E, I, L una tras otra: sin compresión cada columna es contigua y está
+#       alineada a 64 bytes (se puede mapear en memoria); con compresión es una
+#       secuencia de bloques zlib de tam_bloque valores, con los bytes reordenados por
+#       posición (todos los primeros bytes, luego los segundos...) para comprimir mejor
+#   directorio al final: por columna, cantidad de bloques (uint32) y (posición, bytes)
+#       de cada bloque (uint64), seguido de su crc32
+#
+# la malla de tiempo es uniforme y se guarda solo como (t0, tstep, puntos)
+
+MAGIA=b"SEILTRAY"
+VERSION=1
+ENCABEZADO=struct.Struct("<8sHBBIQddQI")
+TAM_ENCABEZADO=64
+ALINEACION=64
+TIPOS={0:np.dtype("<f8"),1:np.dtype("<f4")}
+SIN_COMPRESION=0
+ZLIB=1
+
+
+# reordenar los bytes de un bloque por posición dentro de cada valor y deshacerlo
+def _reordenar(valores:np.ndarray)->bytes:
+    return valores.view(np.uint8).reshape(len(valores),valores.dtype.itemsize).T.tobytes()
+
+def _restaurar(datos:bytes,dtype:np.dtype)->np.ndarray:
+    bytes_=np.frombuffer(datos,dtype=np.uint8).reshape(dtype.itemsize,-1)
+    return np.ascontiguousarray(bytes_.T).view(dtype).ravel()
+
+def _alinear(posicion:int)->int:
+    return -(-posicion//ALINEACION)*ALINEACION
+
+def _codigo_tipo(dtype)->int:
+    for codigo,tipo in TIPOS.items():
+        if tipo==np.dtype(dtype).newbyteorder("<"):
+            return codigo
+    raise ValueError("tipo no soportado: {} (use float64 o float32)".format(dtype))
+
+# t0 y tstep de una malla uniforme
+def _malla_uniforme(t:np.ndarray)->tuple:
+    if len(t)<2:
+        return (float(t[0]) if len(t) else 0.0),0.0
+    tstep=(float(t[-1])-float(t[0]))/(len(t)-1)
+    if not np.allclose(np.diff(t),tstep,rtol=1e-9,atol=1e-12*max(1.0,abs(float(t[-1])))):
+        raise ValueError("la malla de tiempo no es uniforme")
+    return float(t[0]),tstep
+
+
+# escribir una trayectoria (t, y) con y de forma (len(t), 4)
+# dtype=np.float32 reduce el tamaño a la mitad; comprimir usa bloques zlib de tam_bloque valores
+def exportar_trayectoria(archivo,t:np.ndarray,y:np.ndarray,dtype=np.float64,comprimir:bool=False,tam_bloque:int=65536,nivel:int=6):
+    t=np.asarray(t)
+    y=np.asarray(y)
+    if y.ndim!=2 or y.shape!=(len(t),len(ORDEN_COMPARTIMIENTOS)):
+        raise ValueError("y debe tener forma (len(t), {})".format(len(ORDEN_COMPARTIMIENTOS)))
+    codigo=_codigo_tipo(dtype)
+    tipo=TIPOS[codigo]
+    t0,tstep=_malla_uniforme(t)
+    compresion=ZLIB if comprimir else SIN_COMPRESION
+    directorio=[]
+    with open(archivo,"wb") as salida:
+        salida.write(b"\0"*TAM_ENCABEZADO)
+        for i in range(y.shape[1]):
+            bloques=[]
+            if compresion==SIN_COMPRESION:
+                posicion=_alinear(salida.tell())
+                salida.write(b"\0"*(posicion-salida.tell()))
+                # se escribe por bloques para no duplicar columnas grandes en memoria
+                for inicio in range(0,len(t),tam_bloque):
+                    salida.write(np.ascontiguousarray(y[inicio:inicio+tam_bloque,i],dtype=tipo).tobytes())
+                bloques.append((posicion,salida.tell()-posicion))
+            else:
+                for inicio in range(0,len(t),tam_bloque):
+                    datos=zlib.compress(_reordenar(np.ascontiguousarray(y[inicio:inicio+tam_bloque,i],dtype=tipo)),nivel)
+                    bloques.append((salida.tell(),len(datos)))
+                    salida.write(datos)
+            directorio.append(bloques)
+        posicion_directorio=salida.tell()
+        datos=b"".join(struct.pack("<I",len(bloques))+b"".join(struct.pack("<QQ",*bloque) for bloque in bloques) for bloques in directorio)
+        salida.write(datos+struct.pack("<I",zlib.crc32(datos)))
+        encabezado=ENCABEZADO.pack(MAGIA,VERSION,codigo,compresion,tam_bloque,len(t),t0,tstep,posicion_directorio,0)[:-4]
+        salida.seek(0)
+        salida.write(encabezado+struct.pack("<I",zlib.crc32(encabezado)))
+    return
+
+
+# lector de trayectorias exportadas; las columnas sin compresión se mapean sin copiar
+class LectorTrayectoria:
+    def __init__(self,archivo):
+        self.archivo=Path(archivo)
+        with open(self.archivo,"rb") as entrada:
+            encabezado=entrada.read(ENCABEZADO.size)
+            if len(encabezado)<ENCABEZADO.size or encabezado[:len(MAGIA)]!=MAGIA:
+                raise ValueError("{} no es un archivo de trayectoria".format(self.archivo))
+            magia,version,codigo,compresion,tam_bloque,n,t0,tstep,posicion_directorio,crc=ENCABEZADO.unpack(encabezado)
+            if zlib.crc32(encabezado[:-4])!=crc:
+                raise ValueError("suma de verificación del encabezado incorrecta en {}".format(self.archivo))
+            if version!=VERSION or codigo not in TIPOS or compresion not in (SIN_COMPRESION,ZLIB):
+                raise ValueError("versión de trayectoria no soportada: {}".format(version))
+            entrada.seek(posicion_directorio)
+            datos=entrada.read()
+        self.dtype=TIPOS[codigo]
+        self.comprimido=compresion==ZLIB
+        self.tam_bloque=tam_bloque
+        self.n=n
+        self.t0=t0
+        self.tstep=tstep
+        self.bloques=[]
+        posicion=0
+        for _ in ORDEN_COMPARTIMIENTOS:
+            cantidad,=struct.unpack_from("<I",datos,posicion)
+            posicion+=4
+            self.bloques.append([struct.unpack_from("<QQ",datos,posicion+16*j) for j in range(cantidad)])
+            posicion+=16*cantidad
+        if zlib.crc32(datos[:posicion])!=struct.unpack_from("<I",datos,posicion)[0]:
+            raise ValueError("suma de verificación del directorio incorrecta en {}".format(self.archivo))
+
+    def __len__(self)->int:
+        return self.n
+
+    @property
+    def t(self)->np.ndarray:
+        return self.t0+self.tstep*np.arange(self.n,dtype=float)
+
+    # columna completa de un compartimiento ("S", "E", "I" o "L")
+    # sin compresión devuelve un memmap de solo lectura: no se lee nada hasta usarlo
+    def columna(self,nombre:str)->np.ndarray:
+        bloques=self.bloques[ORDEN_COMPARTIMIENTOS.index(nombre)]
+        if self.n==0:
+            return np.empty(0,dtype=self.dtype)
+        if not self.comprimido:
+            posicion,_=bloques[0]
+            return np.memmap(self.archivo,dtype=self.dtype,mode="r",offset=posicion,shape=(self.n,))
+        return np.concatenate(list(self.leer_bloques(nombre))) if bloques else np.empty(0,dtype=self.dtype)
+
+    # recorrer una columna por bloques sin cargarla completa
+    def leer_bloques(self,nombre:str):
+        if not self.comprimido:
+            columna=self.columna(nombre)
+            for inicio in range(0,self.n,self.tam_bloque):
+                yield columna[inicio:inicio+self.tam_bloque]
+            return
+        with open(self.archivo,"rb") as entrada:
+            for posicion,tamaño in self.bloques[ORDEN_COMPARTIMIENTOS.index(nombre)]:
+                entrada.seek(posicion)
+                yield _restaurar(zlib.decompress(entrada.read(tamaño)),self.dtype)
+
+    # trayectoria completa (t, y) con y de forma (n, 4)
+    def leer(self)->tuple:
+        return self.t,np.column_stack([self.columna(nombre) for nombre in ORDEN_COMPARTIMIENTOS])
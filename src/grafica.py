@@ -0,0 +1,89 @@
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.ticker import AutoLocator
+from modelo import ORDEN_COMPARTIMIENTOS
+from diezmado import diezmar
+
+# gráfica S, E, I, L con artistas persistentes
+# los ejes y las cuatro líneas se crean una sola vez; cada actualización solo cambia
+# los datos y la visibilidad y pide un redibujado diferido con draw_idle
+# las líneas reciben una versión diezmada al ancho en píxeles del rango visible; los datos
+# completos se conservan y se vuelven a diezmar cuando cambia el rango del eje x (zoom)
+
+colores={"S":"#3636FF","E":"#51A651","I":"#fb3d3d","L":"#000000"}
+
+# máximo de marcas explícitas en el eje x antes de usar las automáticas
+max_marcas_x=50
+# método de diezmado ("m4" o "lttb"); None grafica todos los puntos
+metodo_diezmado="m4"
+
+
+class GraficaSEIL:
+    def __init__(self,figure:Figure):
+        self.figure=figure
+        self.ax=figure.add_subplot(111)
+        self.lineas={nombre:self.ax.plot([],[],label=nombre,color=colores[nombre])[0] for nombre in ORDEN_COMPARTIMIENTOS}
+        self.ax.grid(True)
+        self.ax.legend(handles=list(self.lineas.values()),loc="upper right")
+        self.t=np.empty(0)
+        self.y=np.empty((0,len(ORDEN_COMPARTIMIENTOS)))
+        self.maximos=np.zeros(len(ORDEN_COMPARTIMIENTOS))
+        self._ajustando=False
+        self.ax.callbacks.connect("xlim_changed",lambda ax:self._diezmar())
+
+    # reemplazar los datos de las líneas; y tiene forma (len(t), 4)
+    # visibles es opcional, por ejemplo {"S":True,"E":False,...}
+    def actualizar(self,t:np.ndarray,y:np.ndarray,tstep:float=None,visibles:dict=None):
+        self.t=np.asarray(t)
+        self.y=np.asarray(y)
+        # máximos por serie, calculados una vez para que mostrar/ocultar no recorra los datos
+        self.maximos=np.nanmax(self.y,axis=0) if len(self.y) else np.zeros(self.y.shape[1])
+        if visibles is not None:
+            for nombre,visible in visibles.items():
+                self.lineas[nombre].set_visible(visible)
+        self._ajustando=True
+        try:
+            self._ajustar_ejes(tstep,limites_x=True)
+        finally:
+            self._ajustando=False
+        self._diezmar()
+        self.dibujar()
+
+    # mostrar u ocultar una serie sin tocar las demás
+    def mostrar(self,nombre:str,visible:bool):
+        self.lineas[nombre].set_visible(visible)
+        self._ajustar_ejes()
+        self.dibujar()
+
+    # pasar a las líneas los datos del rango visible reducidos al ancho de los ejes
+    def _diezmar(self):
+        if self._ajustando:
+            return
+        t_min,t_max=self.ax.get_xlim()
+        ancho=max(int(self.ax.bbox.width),1)
+        for i,linea in enumerate(self.lineas.values()):
+            if metodo_diezmado is None:
+                linea.set_data(self.t,self.y[:,i])
+            else:
+                linea.set_data(*diezmar(self.t,self.y[:,i],ancho,t_min,t_max,metodo_diezmado))
+
+    def _ajustar_ejes(self,tstep:float=None,limites_x:bool=False):
+        if len(self.t)==0:
+            return
+        t0=float(self.t[0])
+        tf=float(self.t[-1])
+        if limites_x:
+            self.ax.set_xlim(t0,tf if tf>t0 else t0+1)
+        visibles=[i for i,linea in enumerate(self.lineas.values()) if linea.get_visible()]
+        if visibles:
+            y_max=float(np.max(self.maximos[visibles]))
+            self.ax.set_ylim(0,y_max if np.isfinite(y_max) and y_max>0 else 1)
+        if tstep is not None:
+            if 0<tstep and (tf-t0)/tstep<=max_marcas_x:
+                self.ax.set_xticks(np.arange(t0,tf,tstep))
+            else:
+                self.ax.xaxis.set_major_locator(AutoLocator())
+
+    def dibujar(self):
+        if self.figure.canvas is not None:
+            self.figure.canvas.draw_idle()
@@ -0,0 +1,160 @@
+from dataclasses import dataclass
+import numpy as np
+import scipy.sparse as sparse
+from modelo import Parametros, ORDEN_PARAMETROS, ORDEN_COMPARTIMIENTOS
+from metodos import PASOS, integrar, integrar_dormand_prince, malla_temporal
+
+# modelo SEIL con N parches (municipios) acoplados por movilidad
+# cada parche tiene sus propios parámetros; la fuerza de infección del parche i usa los
+# infecciosos de todos los parches ponderados por una matriz dispersa M (N, N):
+#   infección_i = β_i S_i Σ_j M_ij (I_j + δ_j L_j)
+# con M = identidad los parches son independientes y cada uno sigue el modelo de un parche.
+# El estado tiene forma (N, 4); el lado derecho es vectorizado y el acoplamiento es un
+# solo producto matriz dispersa por vector.
+
+# métodos de SciPy que aceptan un jacobiano disperso
+METODOS_SCIPY_DISPERSOS=("BDF","Radau")
+
+
+@dataclass
+class Metapoblacion:
+    parametros:Parametros           # campos de forma (N,)
+    movilidad:sparse.csr_matrix     # M de forma (N, N)
+
+    def __len__(self)->int:
+        return self.movilidad.shape[0]
+
+
+# construir la metapoblación desde parámetros (N, 12) o (12,) y una matriz de movilidad
+# (cualquier formato de scipy.sparse o un arreglo denso); sin movilidad los parches no se acoplan
+def crear_metapoblacion(parametros,movilidad=None,n:int=None)->Metapoblacion:
+    parametros=np.atleast_2d(np.asarray(parametros,dtype=float))
+    if parametros.ndim!=2 or parametros.shape[1]!=len(ORDEN_PARAMETROS):
+        raise ValueError("los parámetros deben tener forma (N, {})".format(len(ORDEN_PARAMETROS)))
+    if movilidad is None:
+        movilidad=sparse.identity(n or len(parametros),format="csr")
+    movilidad=sparse.csr_matrix(movilidad,dtype=float)
+    n=movilidad.shape[0]
+    if movilidad.shape!=(n,n):
+        raise ValueError("la matriz de movilidad debe ser cuadrada")
+    if len(parametros) not in (1,n):
+        raise ValueError("parámetros ({}) y movilidad ({}) no tienen el mismo número de parches".format(len(parametros),n))
+    parametros=np.ascontiguousarray(np.broadcast_to(parametros,(n,parametros.shape[1])))
+    if not np.all(np.isfinite(parametros)):
+        raise ValueError("parámetros inválidos: hay valores no finitos")
+    return Metapoblacion(Parametros.desde_arreglo(parametros),movilidad)
+
+
+# matriz de movilidad a partir de flujos: los residentes de origen[m] pasan la fracción
+# fraccion[m] de sus contactos en destino[m]; el resto de sus contactos son en su parche
+def matriz_movilidad(n:int,origen,destino,fraccion)->sparse.csr_matrix:
+    origen=np.asarray(origen,dtype=np.int64)
+    destino=np.asarray(destino,dtype=np.int64)
+    fraccion=np.asarray(fraccion,dtype=float)
+    salida=np.bincount(origen,weights=fraccion,minlength=n)
+    if np.any(salida>1) or np.any(fraccion<0):
+        raise ValueError("las fracciones de cada origen deben ser no negativas y sumar a lo sumo 1")
+    flujos=sparse.coo_matrix((fraccion,(origen,destino)),shape=(n,n))
+    return (flujos+sparse.diags(1-salida)).tocsr()
+
+
+# lado derecho para estados de forma (N, 4)
+def derivadas_metapoblacion(y:np.ndarray,modelo:Metapoblacion)->np.ndarray:
+    p=modelo.parametros
+    S=y[:,0]
+    E=y[:,1]
+    I=y[:,2]
+    L=y[:,3]
+    infeccion=p.β*S*(modelo.movilidad@(I+p.δ*L))
+    progresion=p.k*(1-p.r1)*E
+    perdida=p.φ*(1-p.r2)*I
+    dy=np.empty_like(y)
+    dy[:,0]=p.Λ-infeccion-p.μ*L
+    dy[:,1]=(1-p.ρ)*infeccion+p.r2*I-p.μ*E-progresion
+    dy[:,2]=p.ρ*infeccion+progresion+p.γ*L-(p.μ+p.d1+p.r2)*I-perdida
+    dy[:,3]=perdida-(p.μ-p.d2+p.γ)*L
+    return dy
+
+
+def campo_metapoblacion(modelo:Metapoblacion):
+    def f(t,y):
+        return derivadas_metapoblacion(y,modelo)
+    return f
+
+
+# jacobiano disperso (4N, 4N) del estado aplanado (S_0, E_0, I_0, L_0, S_1, ...)
+# bloques diagonales 4x4 por parche (incluida la infección dentro del parche, M_ii) más,
+# si acoplado, el acoplamiento de S, E, I con I y L de otros parches (M_ij, j != i)
+def jacobiano_metapoblacion(y:np.ndarray,modelo:Metapoblacion,acoplado:bool=True)->sparse.csr_matrix:
+    p=modelo.parametros
+    n=len(modelo)
+    S=y[:,0]
+    contacto=modelo.movilidad@(y[:,2]+p.δ*y[:,3])
+    progresion=p.k*(1-p.r1)
+    perdida=p.φ*(1-p.r2)
+    # d(infección_i)/dI_i = β_i S_i M_ii y d(infección_i)/dL_i = β_i S_i M_ii δ_i
+    propio_I=p.β*S*modelo.movilidad.diagonal()
+    propio_L=propio_I*p.δ
+    B=np.zeros((n,4,4))
+    B[:,0,0]=-p.β*contacto
+    B[:,0,2]=-propio_I
+    B[:,0,3]=-p.μ-propio_L
+    B[:,1,0]=(1-p.ρ)*p.β*contacto
+    B[:,1,1]=-(p.μ+progresion)
+    B[:,1,2]=p.r2+(1-p.ρ)*propio_I
+    B[:,1,3]=(1-p.ρ)*propio_L
+    B[:,2,0]=p.ρ*p.β*contacto
+    B[:,2,1]=progresion
+    B[:,2,2]=-(p.μ+p.d1+p.r2+perdida)+p.ρ*propio_I
+    B[:,2,3]=p.γ+p.ρ*propio_L
+    B[:,3,2]=perdida
+    B[:,3,3]=-(p.μ-p.d2+p.γ)
+    J=sparse.block_diag(B,format="csr")
+    if not acoplado:
+        return J
+    # d(infección_i)/dI_j = β_i S_i M_ij y d(infección_i)/dL_j = β_i S_i M_ij δ_j, j != i
+    externa=modelo.movilidad-sparse.diags(modelo.movilidad.diagonal())
+    acople=sparse.diags(p.β*S)@externa
+    acople_L=acople@sparse.diags(p.δ)
+    for fila,peso in ((0,-1.0),(1,1-p.ρ),(2,p.ρ)):
+        ponderado=sparse.diags(np.broadcast_to(peso,(n,)))
+        for columna,matriz in ((2,acople),(3,acople_L)):
+            unidad=sparse.coo_matrix(([1.0],([fila],[columna])),shape=(4,4))
+            J=J+sparse.kron(ponderado@matriz,unidad,format="csr")
+    return J
+
+
+# integrar la metapoblación sobre la malla t; iniciales de forma (N, 4) o (4,)
+# metodo es uno de los de paso fijo, "dormand_prince", "BDF" o "Radau" (SciPy con jacobiano disperso)
+# devuelve un arreglo de forma (len(t), N, 4)
+# para BDF y Radau el jacobiano por defecto es su diagonal de bloques 4x4 (cada parche con
+# su propia infección) y omite el acoplamiento entre parches: la factorización LU del
+# jacobiano completo se llena con redes de movilidad grandes (miles de parches), mientras
+# que los bloques se factorizan en tiempo lineal; con movilidad débil (M cerca de la
+# identidad) el término omitido es pequeño y Newton converge igual.
+# jacobiano_acoplado=True usa el jacobiano exacto
+def integrar_metapoblacion(metodo:str,modelo:Metapoblacion,iniciales,t:np.ndarray,rtol:float=1e-6,atol:float=1e-9,
+                           jacobiano_acoplado:bool=False)->np.ndarray:
+    n=len(modelo)
+    y0=np.ascontiguousarray(np.broadcast_to(np.asarray(iniciales,dtype=float),(n,len(ORDEN_COMPARTIMIENTOS))))
+    f=campo_metapoblacion(modelo)
+    if metodo in PASOS:
+        return integrar(PASOS[metodo],f,y0,t)
+    if metodo=="dormand_prince":
+        return integrar_dormand_prince(f,y0,t,rtol,atol).y
+    if metodo in METODOS_SCIPY_DISPERSOS:
+        import scipy.integrate
+        forma=y0.shape
+        solucion=scipy.integrate.solve_ivp(lambda t_actual,y:f(t_actual,y.reshape(forma)).ravel(),(t[0],t[-1]),y0.ravel(),
+                                           method=metodo,t_eval=t,rtol=rtol,atol=atol,
+                                           jac=lambda t_actual,y:jacobiano_metapoblacion(y.reshape(forma),modelo,jacobiano_acoplado))
+        if not solucion.success:
+            raise RuntimeError("solve_ivp falló: {}".format(solucion.message))
+        return solucion.y.T.reshape((len(t),)+forma)
+    raise ValueError("método desconocido para metapoblaciones: {}".format(metodo))
+
+
+# metapoblación sobre la malla t0:tstep:tf, devuelve (t, y) con y de forma (len(t), N, 4)
+def metapoblacion(metodo:str,parametros,iniciales,movilidad=None,t0:float=0,tf:float=20,tstep:float=1)->tuple:
+    t=malla_temporal(t0,tf,tstep)
+    return t,integrar_metapoblacion(metodo,crear_metapoblacion(parametros,movilidad,max(len(np.atleast_2d(parametros)),len(np.atleast_2d(iniciales)))),iniciales,t)
@@ -0,0 +1,354 @@
+import numpy as np
+from dataclasses import dataclass
+from modelo import Parametros, campo, derivadas, jacobiano
+
+# métodos de solución, sin variables globales ni interfaz gráfica
+# todos devuelven (t, y) con y de forma (len(t), 4) en el orden S, E, I, L
+
+
+# número de puntos de la malla t0:tstep:tf incluyendo tf
+def numero_puntos(t0:float,tf:float,tstep:float)->int:
+    if not (np.isfinite(t0) and np.isfinite(tf) and np.isfinite(tstep)):
+        raise ValueError("t0, tf y tstep deben ser finitos")
+    if tstep<=0:
+        raise ValueError("el paso de tiempo debe ser positivo")
+    if tf<t0:
+        raise ValueError("el tiempo final debe ser mayor o igual al inicial")
+    return int(np.ceil((tf-t0)/tstep-1e-9))+1
+
+# malla temporal t0:tstep:tf incluyendo tf
+def malla_temporal(t0:float,tf:float,tstep:float)->np.ndarray:
+    return t0+tstep*np.arange(numero_puntos(t0,tf,tstep),dtype=float)
+
+
+# pasos individuales: avanzan y desde t hasta t+h
+# funcionan con y de cualquier forma (..., 4)
+
+# Euler hacia adelante
+def paso_euler_adelante(f,t,y,h):
+    return y+h*f(t,y)
+
+# Euler modificado (Heun)
+def paso_euler_modificado(f,t,y,h):
+    k1=f(t,y)
+    k2=f(t+h,y+h*k1)
+    return y+h*(k1+k2)/2
+
+# Runge-Kutta 2 (punto medio)
+def paso_runge_kutta_2(f,t,y,h):
+    k1=f(t,y)
+    k2=f(t+h/2,y+h/2*k1)
+    return y+h*k2
+
+# Runge-Kutta 4
+def paso_runge_kutta_4(f,t,y,h):
+    k1=f(t,y)
+    k2=f(t+h/2,y+h/2*k1)
+    k3=f(t+h/2,y+h/2*k2)
+    k4=f(t+h,y+h*k3)
+    return y+h*(k1+2*k2+2*k3+k4)/6
+
+
+# cada cuántos pasos llamar a progreso(fracción) para una malla de n puntos (~100 avisos)
+def _intervalo_progreso(n:int)->int:
+    return max(1,(n-1)//100)
+
+
+# integrar con un paso fijo sobre la malla t
+# progreso, si se da, recibe la fracción completada; puede lanzar una excepción para cancelar
+def integrar(paso,f,y0,t:np.ndarray,progreso=None)->np.ndarray:
+    y0=np.asarray(y0,dtype=float)
+    y=np.empty((len(t),)+y0.shape)
+    y[0]=y0
+    cada=_intervalo_progreso(len(t))
+    for i in range(len(t)-1):
+        if progreso is not None and i%cada==0:
+            progreso(i/(len(t)-1))
+        y[i+1]=paso(f,t[i],y[i],t[i+1]-t[i])
+    return y
+
+
+def _resolver(paso,p:Parametros,y0,t0:float,tf:float,tstep:float)->tuple:
+    t=malla_temporal(t0,tf,tstep)
+    return t,integrar(paso,campo(p),y0,t)
+
+# Euler hacia adelante
+def euler_hacia_adelante(p:Parametros,y0,t0:float=0,tf:float=20,tstep:float=1)->tuple:
+    return _resolver(paso_euler_adelante,p,y0,t0,tf,tstep)
+
+# Euler modificado
+def euler_modificado(p:Parametros,y0,t0:float=0,tf:float=20,tstep:float=1)->tuple:
+    return _resolver(paso_euler_modificado,p,y0,t0,tf,tstep)
+
+# Runge-Kutta 2
+def runge_kutta_2(p:Parametros,y0,t0:float=0,tf:float=20,tstep:float=1)->tuple:
+    return _resolver(paso_runge_kutta_2,p,y0,t0,tf,tstep)
+
+# Runge-Kutta 4
+def runge_kutta_4(p:Parametros,y0,t0:float=0,tf:float=20,tstep:float=1)->tuple:
+    return _resolver(paso_runge_kutta_4,p,y0,t0,tf,tstep)
+
+
+# Dormand-Prince (RK45) con paso adaptativo y salida densa
+
+# tabla de Butcher de Dormand-Prince 5(4)
+_DP_C=np.array([0,1/5,3/10,4/5,8/9,1])
+_DP_A=np.array([
+    [0,0,0,0,0],
+    [1/5,0,0,0,0],
+    [3/40,9/40,0,0,0],
+    [44/45,-56/15,32/9,0,0],
+    [19372/6561,-25360/2187,64448/6561,-212/729,0],
+    [9017/3168,-355/33,46732/5247,49/176,-5103/18656]])
+_DP_B=np.array([35/384,0,500/1113,125/192,-2187/6784,11/84])
+# diferencia entre la solución de orden 5 y la de orden 4 (incluye k7)
+_DP_E=np.array([-71/57600,0,71/16695,-71/1920,17253/339200,-22/525,1/40])
+# coeficientes del interpolante de orden 4 para la salida densa
+_DP_P=np.array([
+    [1,-8048581381/2820520608,8663915743/2820520608,-12715105075/11282082432],
+    [0,0,0,0],
+    [0,131558114200/32700410799,-68118460800/10900136933,87487479700/32700410799],
+    [0,-1754552775/470086768,14199869525/1410260304,-10690763975/1880347072],
+    [0,127303824393/49829197408,-318862633887/49829197408,701980252875/199316789632],
+    [0,-282668133/205662961,2019193451/616988883,-1453857185/822651844],
+    [0,40617522/29380423,-110615467/29380423,69997945/29380423]])
+
+
+# solución de un método adaptativo evaluada en la malla pedida, con contadores
+@dataclass
+class SolucionAdaptativa:
+    t:np.ndarray            # malla de salida
+    y:np.ndarray            # solución en la malla, forma (len(t), 4)
+    pasos:np.ndarray        # tiempos de los pasos aceptados
+    nfev:int                # evaluaciones del lado derecho
+    aceptados:int           # pasos aceptados
+    rechazados:int          # pasos rechazados
+
+
+def _norma_rms(x)->float:
+    return float(np.sqrt(np.mean(np.square(x))))
+
+# paso inicial (Hairer, Nørsett y Wanner)
+def _paso_inicial(f,t,y,f0,rtol,atol,orden=5)->tuple:
+    escala=atol+np.abs(y)*rtol
+    d0=_norma_rms(y/escala)
+    d1=_norma_rms(f0/escala)
+    h0=1e-6 if d0<1e-5 or d1<1e-5 else 0.01*d0/d1
+    f1=f(t+h0,y+h0*f0)
+    d2=_norma_rms((f1-f0)/escala)/h0
+    if d1<=1e-15 and d2<=1e-15:
+        h1=max(1e-6,h0*1e-3)
+    else:
+        h1=(0.01/max(d1,d2))**(1/orden)
+    return min(100*h0,h1)
+
+
+# integrar f desde t_eval[0] hasta t_eval[-1] controlando el error local
+# la solución se evalúa en t_eval con el interpolante denso de cada paso aceptado
+def integrar_dormand_prince(f,y0,t_eval,rtol:float=1e-6,atol:float=1e-9,h0:float=None,h_max:float=np.inf,progreso=None)->SolucionAdaptativa:
+    t_eval=np.asarray(t_eval,dtype=float)
+    t=t_eval[0]
+    tf=t_eval[-1]
+    y=np.array(y0,dtype=float)
+    salida=np.empty((len(t_eval),)+y.shape)
+    salida[0]=y
+    siguiente=1
+    K=np.empty((7,)+y.shape)
+    K[0]=f(t,y)
+    nfev=1
+    if h0 is None:
+        h=_paso_inicial(f,t,y,K[0],rtol,atol)
+        nfev+=1
+    else:
+        h=h0
+    aceptados=0
+    rechazados=0
+    pasos=[t]
+    while t<tf:
+        h=min(h,h_max,tf-t)
+        if h<=10*np.spacing(max(abs(t),1.0)):
+            raise RuntimeError("el paso de tiempo es demasiado pequeño en t={}".format(t))
+        for i in range(1,6):
+            K[i]=f(t+_DP_C[i]*h,y+h*np.tensordot(_DP_A[i,:i],K[:i],axes=1))
+        y_nuevo=y+h*np.tensordot(_DP_B,K[:6],axes=1)
+        K[6]=f(t+h,y_nuevo)
+        nfev+=6
+        escala=atol+rtol*np.maximum(np.abs(y),np.abs(y_nuevo))
+        error=_norma_rms(h*np.tensordot(_DP_E,K,axes=1)/escala)
+        if error>1:
+            rechazados+=1
+            h*=max(0.2,0.9*error**-0.2)
+            continue
+        t_nuevo=tf if tf-(t+h)<=10*np.spacing(tf) else t+h
+        # salida densa en los puntos de la malla dentro de (t, t_nuevo]
+        fin=siguiente+int(np.searchsorted(t_eval[siguiente:],t_nuevo,side="right"))
+        if fin>siguiente:
+            Q=np.tensordot(K,_DP_P,axes=(0,0))
+            x=(t_eval[siguiente:fin]-t)/h
+            potencias=np.cumprod(np.repeat(x[:,None],4,axis=1),axis=1)
+            salida[siguiente:fin]=y+h*np.tensordot(potencias,Q,axes=(1,-1))
+            if t_eval[fin-1]==t_nuevo:
+                salida[fin-1]=y_nuevo
+            siguiente=fin
+        aceptados+=1
+        t=t_nuevo
+        y=y_nuevo
+        pasos.append(t)
+        if progreso is not None:
+            progreso((t-t_eval[0])/(tf-t_eval[0]))
+        K[0]=K[6]
+        h*=10 if error==0 else min(10,0.9*error**-0.2)
+    return SolucionAdaptativa(t_eval,salida,np.array(pasos),nfev,aceptados,rechazados)
+
+
+# Dormand-Prince sobre la malla t0:tstep:tf (el paso interno es adaptativo)
+def dormand_prince(p:Parametros,y0,t0:float=0,tf:float=20,tstep:float=1,rtol:float=1e-6,atol:float=1e-9)->tuple:
+    solucion=integrar_dormand_prince(campo(p),y0,malla_temporal(t0,tf,tstep),rtol,atol)
+    return solucion.t,solucion.y
+
+
+# Euler hacia atrás (implícito) con iteraciones de Newton
+
+# solución de un método implícito con contadores
+@dataclass
+class SolucionImplicita:
+    t:np.ndarray            # malla de salida
+    y:np.ndarray            # solución en la malla, forma (len(t), 4)
+    nfev:int                # evaluaciones del lado derecho
+    njev:int                # evaluaciones del jacobiano
+    iteraciones:int         # iteraciones de Newton en total
+
+
+# integrar resolviendo z = y + h*f(t+h, z) en cada paso con Newton simplificado
+# la matriz I - h*J se reutiliza entre iteraciones y entre pasos mientras Newton converja;
+# solo se recalcula el jacobiano cuando la convergencia se vuelve lenta o falla
+def integrar_euler_hacia_atras(f,jac,y0,t:np.ndarray,rtol:float=1e-8,atol:float=1e-10,max_iter:int=10,progreso=None)->SolucionImplicita:
+    y0=np.asarray(y0,dtype=float)
+    y=np.empty((len(t),)+y0.shape)
+    y[0]=y0
+    identidad=np.eye(len(y0))
+    inversa=None
+    h_inversa=None
+    nfev=0
+    njev=0
+    iteraciones=0
+    cada=_intervalo_progreso(len(t))
+    for i in range(len(t)-1):
+        if progreso is not None and i%cada==0:
+            progreso(i/(len(t)-1))
+        h=t[i+1]-t[i]
+        t_nuevo=t[i+1]
+        # predictor: extrapolación lineal de los dos últimos puntos
+        z=y[i] if i==0 else 2*y[i]-y[i-1]
+        nuevo=False
+        while True:
+            if inversa is None or h!=h_inversa:
+                inversa=np.linalg.inv(identidad-h*jac(t_nuevo,z))
+                h_inversa=h
+                njev+=1
+                nuevo=True
+            anterior=None
+            convergio=False
+            for _ in range(max_iter):
+                residuo=z-y[i]-h*f(t_nuevo,z)
+                nfev+=1
+                iteraciones+=1
+                delta=-inversa@residuo
+                z=z+delta
+                norma=_norma_rms(delta/(atol+rtol*np.abs(z)))
+                if norma<=1:
+                    convergio=True
+                    break
+                # convergencia lenta con un jacobiano viejo: pedir uno nuevo
+                if not nuevo and anterior is not None and norma>0.5*anterior:
+                    break
+                anterior=norma
+            if convergio:
+                break
+            if nuevo or not np.all(np.isfinite(z)):
+                raise RuntimeError("Newton no converge en t={}; reduzca el paso de tiempo".format(t_nuevo))
+            inversa=None
+        y[i+1]=z
+    return SolucionImplicita(t,y,nfev,njev,iteraciones)
+
+
+# Euler hacia atrás sobre la malla t0:tstep:tf
+def euler_hacia_atras(p:Parametros,y0,t0:float=0,tf:float=20,tstep:float=1)->tuple:
+    t=malla_temporal(t0,tf,tstep)
+    solucion=integrar_euler_hacia_atras(campo(p),lambda t,y:jacobiano(y,p),y0,t)
+    return solucion.t,solucion.y
+
+
+# solve_ivp de SciPy con jacobiano analítico y lado derecho vectorizado
+
+# métodos de SciPy soportados (todos usan el jacobiano)
+METODOS_SCIPY=("LSODA","BDF","Radau")
+
+# solución de SciPy con los contadores de la corrida
+@dataclass
+class SolucionScipy:
+    t:np.ndarray            # malla de salida
+    y:np.ndarray            # solución en la malla, forma (len(t), 4)
+    nfev:int                # evaluaciones del lado derecho
+    njev:int                # evaluaciones del jacobiano
+    nlu:int                 # descomposiciones LU
+
+
+# integrar con scipy.integrate.solve_ivp evaluando en la malla t
+def integrar_solve_ivp(p:Parametros,y0,t:np.ndarray,method:str="LSODA",rtol:float=1e-6,atol:float=1e-9,progreso=None)->SolucionScipy:
+    if method not in METODOS_SCIPY:
+        raise ValueError("método de SciPy no soportado: {} (use {})".format(method,", ".join(METODOS_SCIPY)))
+    import scipy.integrate
+    # SciPy pasa y de forma (4,) o (4, k) cuando vectorized=True
+    duracion=t[-1]-t[0]
+    def f(t_actual,y):
+        if progreso is not None and duracion>0:
+            progreso(min(1.0,(t_actual-t[0])/duracion))
+        return derivadas(y.T,p).T
+    def jac(t,y):
+        return jacobiano(y,p)
+    solucion=scipy.integrate.solve_ivp(f,(t[0],t[-1]),np.asarray(y0,dtype=float),method=method,t_eval=t,
+                                       jac=jac,vectorized=True,rtol=rtol,atol=atol)
+    if not solucion.success:
+        raise RuntimeError("solve_ivp falló: {}".format(solucion.message))
+    return SolucionScipy(t,solucion.y.T,solucion.nfev,solucion.njev,solucion.nlu)
+
+
+# solve_ivp de SciPy sobre la malla t0:tstep:tf
+def solve_ivp(p:Parametros,y0,t0:float=0,tf:float=20,tstep:float=1,method:str="LSODA",rtol:float=1e-6,atol:float=1e-9)->tuple:
+    solucion=integrar_solve_ivp(p,y0,malla_temporal(t0,tf,tstep),method,rtol,atol)
+    return solucion.t,solucion.y
+
+
+# métodos disponibles por nombre
+METODOS={
+    "euler_hacia_adelante":euler_hacia_adelante,
+    "euler_hacia_atras":euler_hacia_atras,
+    "euler_modificado":euler_modificado,
+    "runge_kutta_2":runge_kutta_2,
+    "runge_kutta_4":runge_kutta_4,
+    "dormand_prince":dormand_prince,
+    "solve_ivp":solve_ivp,
+}
+
+# pasos de cada método, usados por los modos por lotes
+PASOS={
+    "euler_hacia_adelante":paso_euler_adelante,
+    "euler_modificado":paso_euler_modificado,
+    "runge_kutta_2":paso_runge_kutta_2,
+    "runge_kutta_4":paso_runge_kutta_4,
+}
+
+
+# integrar con un método por nombre sobre una malla dada (t[0] es el instante de y0)
+# permite continuar una solución desde su último punto
+def integrar_en_malla(metodo:str,p:Parametros,y0,t:np.ndarray,progreso=None)->np.ndarray:
+    if metodo in PASOS:
+        return integrar(PASOS[metodo],campo(p),y0,t,progreso=progreso)
+    if metodo=="euler_hacia_atras":
+        return integrar_euler_hacia_atras(campo(p),lambda t,y:jacobiano(y,p),y0,t,progreso=progreso).y
+    if metodo=="dormand_prince":
+        return integrar_dormand_prince(campo(p),y0,t,progreso=progreso).y
+    if metodo=="solve_ivp":
+        return integrar_solve_ivp(p,y0,t,progreso=progreso).y
+    raise ValueError("método desconocido: {}".format(metodo))
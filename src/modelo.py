@@ -0,0 +1,182 @@
+from dataclasses import dataclass, fields
+import numpy as np
+
+# modelo SEIL de tuberculosis, independiente de la interfaz gráfica
+
+# orden de los parámetros (el mismo que se guarda en save.bin)
+ORDEN_PARAMETROS=("Λ","β","δ","ρ","μ","k","r1","r2","φ","γ","d1","d2")
+# orden de los compartimientos en el vector de estado
+ORDEN_COMPARTIMIENTOS=("S","E","I","L")
+
+
+# parámetros matemáticos del modelo
+# cada campo puede ser un float o un arreglo de numpy (un valor por escenario)
+@dataclass(frozen=True)
+class Parametros:
+    Λ   :float  # tasa de reclutamiento
+    β   :float  # coeficiente de transmisión
+    δ   :float  # fracción de "pérdida de rastro" entre los infectados
+    ρ   :float  # proporción de progresión rápida
+    μ   :float  # tasa de muertes naturales
+    k   :float  # tasa de progresión de E a I
+    r1  :float  # tasa de quimioprofilaxis efectiva
+    r2  :float  # tasa de terapias exitosas
+    φ   :float  # tasa de "pérdida de rastro"
+    γ   :float  # tasa de retorno al hospital
+    d1  :float  # tasa de muerte en infecciosos
+    d2  :float  # tasa de muerte en "pérdida de rastro"
+
+    def __iter__(self):
+        return (getattr(self,nombre) for nombre in ORDEN_PARAMETROS)
+
+    # parámetros como arreglo de forma (..., 12)
+    def como_arreglo(self)->np.ndarray:
+        return np.stack(np.broadcast_arrays(*[np.asarray(x,dtype=float) for x in self]),axis=-1)
+
+    # construir desde un arreglo de forma (12,) o (N, 12)
+    @classmethod
+    def desde_arreglo(cls,valores)->"Parametros":
+        valores=np.asarray(valores,dtype=float)
+        if valores.shape[-1]!=len(ORDEN_PARAMETROS):
+            raise ValueError("se esperaban {} parámetros, se recibieron {}".format(len(ORDEN_PARAMETROS),valores.shape[-1]))
+        if valores.ndim==1:
+            return cls(*[float(x) for x in valores])
+        return cls(*[valores[...,i] for i in range(len(ORDEN_PARAMETROS))])
+
+    @classmethod
+    def desde_diccionario(cls,valores:dict)->"Parametros":
+        faltantes=[nombre for nombre in ORDEN_PARAMETROS if valores.get(nombre) is None]
+        if faltantes:
+            raise ValueError("faltan parámetros: {}".format(", ".join(faltantes)))
+        return cls(*[float(valores[nombre]) for nombre in ORDEN_PARAMETROS])
+
+assert tuple(f.name for f in fields(Parametros))==ORDEN_PARAMETROS
+
+
+# lado derecho del sistema SEIL para un vector de estado y de forma (..., 4)
+# las cuatro derivadas se calculan juntas; p puede tener campos escalares o arreglos
+def derivadas(y:np.ndarray,p:Parametros)->np.ndarray:
+    S=y[...,0]
+    E=y[...,1]
+    I=y[...,2]
+    L=y[...,3]
+    infeccion=p.β*S*(I+p.δ*L)
+    progresion=p.k*(1-p.r1)*E
+    perdida=p.φ*(1-p.r2)*I
+    dy=np.empty(np.broadcast(y[...,0],infeccion).shape+(4,))
+    dy[...,0]=p.Λ-infeccion-p.μ*L
+    dy[...,1]=(1-p.ρ)*infeccion+p.r2*I-p.μ*E-progresion
+    dy[...,2]=p.ρ*infeccion+progresion+p.γ*L-(p.μ+p.d1+p.r2)*I-perdida
+    dy[...,3]=perdida-(p.μ-p.d2+p.γ)*L
+    return dy
+
+
+# validar parámetros escalares una sola vez: todos deben ser números finitos
+def validar_parametros(p:Parametros):
+    invalidos=[nombre for nombre,valor in zip(ORDEN_PARAMETROS,p) if np.ndim(valor)!=0 or not np.isfinite(valor)]
+    if invalidos:
+        raise ValueError("parámetros inválidos: {}".format(", ".join(invalidos)))
+
+
+# lado derecho especializado para un juego de parámetros escalares
+# las combinaciones constantes se calculan una vez y la función resultante solo usa
+# variables locales y floats de Python; y debe tener forma (4,)
+def crear_kernel(p:Parametros):
+    validar_parametros(p)
+    Λ,β,δ,ρ,μ,k,r1,r2,φ,γ,d1,d2=(float(x) for x in p)
+    salida_E=μ+k*(1-r1)             # salida de E
+    salida_I=μ+d1+φ*(1-r2)+r2       # salida de I
+    salida_L=μ-d2+γ                 # salida de L
+    progresion=k*(1-r1)
+    perdida=φ*(1-r2)
+    β_E=β*(1-ρ)
+    β_I=β*ρ
+    array=np.array
+    def f(t,y):
+        if y.ndim!=1:
+            return derivadas(y,p)
+        S,E,I,L=y.tolist()
+        contacto=S*(I+δ*L)
+        return array((Λ-β*contacto-μ*L,
+                      β_E*contacto+r2*I-salida_E*E,
+                      β_I*contacto+progresion*E+γ*L-salida_I*I,
+                      perdida*I-salida_L*L))
+    return f
+
+
+# función f(t, y) lista para los métodos de solución
+# con parámetros escalares usa el kernel especializado; con parámetros por escenario
+# (arreglos) usa la versión vectorizada
+def campo(p:Parametros):
+    if all(np.ndim(x)==0 for x in p):
+        return crear_kernel(p)
+    def f(t,y):
+        return derivadas(y,p)
+    return f
+
+
+# jacobiano analítico del lado derecho, de forma (..., 4, 4)
+# J[..., i, j] = d(dy_i)/d(y_j) con i, j en el orden S, E, I, L
+def jacobiano(y:np.ndarray,p:Parametros)->np.ndarray:
+    S=y[...,0]
+    I=y[...,2]
+    L=y[...,3]
+    dS=p.β*(I+p.δ*L)       # d(infección)/dS
+    dI=p.β*S               # d(infección)/dI
+    dL=p.β*p.δ*S           # d(infección)/dL
+    progresion=p.k*(1-p.r1)
+    perdida=p.φ*(1-p.r2)
+    J=np.zeros(np.broadcast(S,dS,p.Λ).shape+(4,4))
+    J[...,0,0]=-dS
+    J[...,0,2]=-dI
+    J[...,0,3]=-dL-p.μ
+    J[...,1,0]=(1-p.ρ)*dS
+    J[...,1,1]=-(p.μ+progresion)
+    J[...,1,2]=(1-p.ρ)*dI+p.r2
+    J[...,1,3]=(1-p.ρ)*dL
+    J[...,2,0]=p.ρ*dS
+    J[...,2,1]=progresion
+    J[...,2,2]=p.ρ*dI-(p.μ+p.d1+p.r2+perdida)
+    J[...,2,3]=p.ρ*dL+p.γ
+    J[...,3,2]=perdida
+    J[...,3,3]=-(p.μ-p.d2+p.γ)
+    return J
+
+
+# derivadas del lado derecho respecto a los 12 parámetros, de forma (..., 4, 12)
+# D[..., i, j] = d(dy_i)/d(parámetro j) con j en el orden de ORDEN_PARAMETROS
+def derivadas_parametros(y:np.ndarray,p:Parametros)->np.ndarray:
+    S=y[...,0]
+    E=y[...,1]
+    I=y[...,2]
+    L=y[...,3]
+    contacto=S*(I+p.δ*L)
+    D=np.zeros(np.broadcast(S,contacto).shape+(4,len(ORDEN_PARAMETROS)))
+    j={nombre:i for i,nombre in enumerate(ORDEN_PARAMETROS)}
+    D[...,0,j["Λ"]]=1
+    D[...,0,j["β"]]=-contacto
+    D[...,1,j["β"]]=(1-p.ρ)*contacto
+    D[...,2,j["β"]]=p.ρ*contacto
+    D[...,0,j["δ"]]=-p.β*S*L
+    D[...,1,j["δ"]]=(1-p.ρ)*p.β*S*L
+    D[...,2,j["δ"]]=p.ρ*p.β*S*L
+    D[...,1,j["ρ"]]=-p.β*contacto
+    D[...,2,j["ρ"]]=p.β*contacto
+    D[...,0,j["μ"]]=-L
+    D[...,1,j["μ"]]=-E
+    D[...,2,j["μ"]]=-I
+    D[...,3,j["μ"]]=-L
+    D[...,1,j["k"]]=-(1-p.r1)*E
+    D[...,2,j["k"]]=(1-p.r1)*E
+    D[...,1,j["r1"]]=p.k*E
+    D[...,2,j["r1"]]=-p.k*E
+    D[...,1,j["r2"]]=I
+    D[...,2,j["r2"]]=(p.φ-1)*I
+    D[...,3,j["r2"]]=-p.φ*I
+    D[...,2,j["φ"]]=-(1-p.r2)*I
+    D[...,3,j["φ"]]=(1-p.r2)*I
+    D[...,2,j["γ"]]=L
+    D[...,3,j["γ"]]=-L
+    D[...,2,j["d1"]]=-I
+    D[...,3,j["d2"]]=L
+    return D
@@ -0,0 +1,83 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from modelo import ORDEN_COMPARTIMIENTOS
+from metodos import malla_temporal
+from barrido import preparar_lote, integrar_lote
+
+# ejecución de barridos en varios procesos
+# los trabajadores escriben las trayectorias directamente en un bloque de memoria
+# compartida de forma (escenarios, puntos de tiempo, 4), sin devolver arreglos al padre
+
+
+# resultados de un barrido en paralelo; el arreglo y vive en memoria compartida
+# usar como contexto o llamar cerrar() para liberar la memoria
+class ResultadosCompartidos:
+    def __init__(self,t:np.ndarray,forma:tuple):
+        self.t=t
+        tamaño=int(np.prod(forma))*np.dtype(float).itemsize
+        self._memoria=shared_memory.SharedMemory(create=True,size=max(tamaño,1))
+        self.y=np.ndarray(forma,dtype=float,buffer=self._memoria.buf)
+
+    @property
+    def nombre(self)->str:
+        return self._memoria.name
+
+    # copia de las trayectorias que sobrevive a cerrar()
+    def copiar(self)->np.ndarray:
+        return np.array(self.y)
+
+    def cerrar(self):
+        if self._memoria is None:
+            return
+        self.y=None
+        self._memoria.close()
+        self._memoria.unlink()
+        self._memoria=None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*args):
+        self.cerrar()
+
+
+# trabajador: integra los escenarios [inicio, fin) y escribe en la memoria compartida
+def _integrar_bloque(nombre:str,forma:tuple,inicio:int,fin:int,metodo:str,parametros,iniciales,t)->int:
+    memoria=shared_memory.SharedMemory(name=nombre)
+    try:
+        y=np.ndarray(forma,dtype=float,buffer=memoria.buf)
+        integrar_lote(metodo,parametros,iniciales,t,salida=y[inicio:fin])
+        del y
+    finally:
+        memoria.close()
+    return fin-inicio
+
+
+# dividir n escenarios en bloques de tamaño tam_bloque
+def dividir_bloques(n:int,tam_bloque:int)->list:
+    return [(inicio,min(inicio+tam_bloque,n)) for inicio in range(0,n,tam_bloque)]
+
+
+# barrido en paralelo sobre la malla t0:tstep:tf
+# por defecto usa un proceso por núcleo y unos cuatro bloques por proceso
+def barrido_paralelo(metodo:str,parametros,iniciales,t0:float=0,tf:float=20,tstep:float=1,trabajadores:int=None,tam_bloque:int=None)->ResultadosCompartidos:
+    parametros,iniciales=preparar_lote(parametros,iniciales)
+    t=malla_temporal(t0,tf,tstep)
+    n=len(parametros)
+    trabajadores=trabajadores or os.cpu_count() or 1
+    if tam_bloque is None:
+        tam_bloque=max(1,-(-n//(4*trabajadores)))
+    forma=(n,len(t),len(ORDEN_COMPARTIMIENTOS))
+    resultados=ResultadosCompartidos(t,forma)
+    try:
+        with ProcessPoolExecutor(max_workers=trabajadores) as ejecutor:
+            tareas=[ejecutor.submit(_integrar_bloque,resultados.nombre,forma,inicio,fin,metodo,parametros[inicio:fin],iniciales[inicio:fin],t)
+                    for inicio,fin in dividir_bloques(n,tam_bloque)]
+            for tarea in tareas:
+                tarea.result()
+    except BaseException:
+        resultados.cerrar()
+        raise
+    return resultados
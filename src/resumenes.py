@@ -0,0 +1,192 @@
+import numpy as np
+from modelo import Parametros, ORDEN_COMPARTIMIENTOS, campo
+from metodos import PASOS, numero_puntos
+from barrido import preparar_lote
+from bloques import integrar_por_bloques
+
+# eventos y estadísticas de resumen calculados mientras se integra, sin guardar la trayectoria
+# cada resumen recibe bloques consecutivos (t, y) con t de forma (m,) e y de forma (m, 4)
+# (o (m, N, 4) en un barrido) y guarda solo el último punto para enlazar con el siguiente
+# bloque; la memoria no depende de tf
+
+
+class Resumen:
+    nombre="resumen"
+
+    def iniciar(self,p:Parametros):
+        self.p=p
+        self._t=None
+        self._y=None
+
+    # agregar un bloque; el último punto del bloque anterior se antepone para que los
+    # intervalos entre bloques también se cuenten
+    def actualizar(self,t:np.ndarray,y:np.ndarray):
+        if self._t is not None:
+            t=np.concatenate(([self._t],t))
+            y=np.concatenate((self._y[None],y))
+        self._procesar(t,y)
+        self._t=t[-1]
+        self._y=y[-1].copy()
+
+    def _procesar(self,t:np.ndarray,y:np.ndarray):
+        raise NotImplementedError
+
+    # diccionario nombre -> valor (float, o arreglo de N valores en un barrido)
+    def valores(self)->dict:
+        raise NotImplementedError
+
+
+def _como_resultado(x):
+    return float(x) if np.ndim(x)==0 else x
+
+
+# altura y tiempo del máximo de un compartimiento (el primero si se repite)
+class Pico(Resumen):
+    def __init__(self,compartimiento:str="I"):
+        self.i=ORDEN_COMPARTIMIENTOS.index(compartimiento)
+        self.nombre="pico_{}".format(compartimiento)
+
+    def iniciar(self,p:Parametros):
+        super().iniciar(p)
+        self.altura=-np.inf
+        self.tiempo=np.nan
+
+    def _procesar(self,t,y):
+        serie=y[...,self.i]
+        j=np.argmax(serie,axis=0)
+        altura=np.take_along_axis(serie,np.expand_dims(j,0),axis=0)[0]
+        mayor=altura>self.altura
+        self.altura=np.where(mayor,altura,self.altura)
+        self.tiempo=np.where(mayor,t[j],self.tiempo)
+
+    def valores(self)->dict:
+        return {self.nombre:_como_resultado(self.altura),"t_"+self.nombre:_como_resultado(self.tiempo)}
+
+
+# primer tiempo en que un compartimiento queda por debajo (o por encima) de un umbral,
+# interpolado linealmente entre pasos; nan si no ocurre
+class Cruce(Resumen):
+    def __init__(self,compartimiento:str="I",umbral:float=1.0,direccion:str="abajo"):
+        if direccion not in ("abajo","arriba"):
+            raise ValueError("dirección desconocida: {}".format(direccion))
+        self.i=ORDEN_COMPARTIMIENTOS.index(compartimiento)
+        self.umbral=umbral
+        self.direccion=direccion
+        self.nombre="t_{}_{}_{:g}".format(compartimiento,direccion,umbral)
+
+    def iniciar(self,p:Parametros):
+        super().iniciar(p)
+        self.tiempo=np.nan
+
+    def _procesar(self,t,y):
+        pendientes=np.isnan(self.tiempo)
+        if not np.any(pendientes):
+            return
+        serie=y[...,self.i]
+        cumple=serie<self.umbral if self.direccion=="abajo" else serie>self.umbral
+        hay=np.any(cumple,axis=0)
+        j=np.argmax(cumple,axis=0)
+        anterior=np.maximum(j-1,0)
+        a=np.take_along_axis(serie,np.expand_dims(anterior,0),axis=0)[0]
+        b=np.take_along_axis(serie,np.expand_dims(j,0),axis=0)[0]
+        with np.errstate(all="ignore"):
+            fraccion=np.where(j>0,np.clip((self.umbral-a)/(b-a),0,1),0)
+        tiempo=t[anterior]+fraccion*(t[j]-t[anterior])
+        self.tiempo=np.where(pendientes&hay,tiempo,self.tiempo)
+
+    def valores(self)->dict:
+        return {self.nombre:_como_resultado(self.tiempo)}
+
+
+# integral en el tiempo de un compartimiento (regla del trapecio)
+class Integral(Resumen):
+    def __init__(self,compartimiento:str="L"):
+        self.i=ORDEN_COMPARTIMIENTOS.index(compartimiento)
+        self.nombre="integral_{}".format(compartimiento)
+
+    def iniciar(self,p:Parametros):
+        super().iniciar(p)
+        self.total=0.0
+
+    def _integrando(self,y):
+        return y[...,self.i]
+
+    def _procesar(self,t,y):
+        if len(t)<2:
+            return
+        valores=self._integrando(y)
+        h=np.diff(t).reshape((-1,)+(1,)*(valores.ndim-1))
+        self.total=self.total+np.sum(h*(valores[1:]+valores[:-1])/2,axis=0)
+
+    def valores(self)->dict:
+        return {self.nombre:_como_resultado(self.total)}
+
+
+# infecciones acumuladas: integral del flujo β S (I + δ L) hacia E e I
+class InfeccionesAcumuladas(Integral):
+    def __init__(self):
+        self.nombre="infecciones_acumuladas"
+
+    def _integrando(self,y):
+        return self.p.β*y[...,0]*(y[...,2]+self.p.δ*y[...,3])
+
+
+# estado al final de la integración
+class Final(Resumen):
+    nombre="final"
+
+    def _procesar(self,t,y):
+        pass
+
+    def valores(self)->dict:
+        return {"{}_final".format(nombre):_como_resultado(self._y[...,i]) for i,nombre in enumerate(ORDEN_COMPARTIMIENTOS)}
+
+
+# valores de todos los resúmenes en un solo diccionario
+def _valores(resumenes)->dict:
+    valores={}
+    for resumen in resumenes:
+        valores.update(resumen.valores())
+    return valores
+
+
+# integrar un escenario con cualquier método calculando solo los resúmenes
+# la trayectoria se produce en bloques de tam_bloque puntos que se descartan al procesarlos
+def resumir(metodo:str,p:Parametros,y0,resumenes,t0:float=0,tf:float=20,tstep:float=1,tam_bloque:int=4096)->dict:
+    for resumen in resumenes:
+        resumen.iniciar(p)
+    for t,y in integrar_por_bloques(metodo,p,y0,t0,tf,tstep,tam_bloque):
+        for resumen in resumenes:
+            resumen.actualizar(t,y)
+    return _valores(resumenes)
+
+
+# barrido de N escenarios con un método de paso fijo calculando solo los resúmenes
+# devuelve un arreglo de N valores por resumen; la memoria es O(tam_bloque * N)
+def resumir_lote(metodo:str,parametros,iniciales,resumenes,t0:float=0,tf:float=20,tstep:float=1,tam_bloque:int=256)->dict:
+    if metodo not in PASOS:
+        raise ValueError("método desconocido para barridos: {}".format(metodo))
+    paso=PASOS[metodo]
+    parametros,iniciales=preparar_lote(parametros,iniciales)
+    p=Parametros.desde_arreglo(parametros)
+    f=campo(p)
+    for resumen in resumenes:
+        resumen.iniciar(p)
+    n=numero_puntos(t0,tf,tstep)
+    bloque=np.empty((min(tam_bloque,n),)+iniciales.shape)
+    y=iniciales.copy()
+    bloque[0]=y
+    m=1
+    for i in range(1,n+1):
+        if m==len(bloque) or i==n:
+            t=t0+tstep*np.arange(i-m,i,dtype=float)
+            for resumen in resumenes:
+                resumen.actualizar(t,bloque[:m])
+            m=0
+        if i==n:
+            break
+        anterior=t0+tstep*(i-1)
+        y=paso(f,anterior,y,(t0+tstep*i)-anterior)
+        bloque[m]=y
+        m+=1
+    return _valores(resumenes)
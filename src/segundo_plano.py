@@ -0,0 +1,84 @@
+import threading
+from modelo import Parametros
+from cache import CacheSoluciones
+
+# resolución en un hilo de trabajo para no bloquear la interfaz
+# solo se conserva la última solicitud: al enviar una nueva, la anterior se cancela
+# y su resultado se descarta; la interfaz consulta el estado periódicamente (window.after)
+
+
+# se lanza desde el aviso de progreso para detener una integración cancelada
+class SolucionCancelada(Exception):
+    pass
+
+
+class SolucionEnSegundoPlano:
+    def __init__(self,cache:CacheSoluciones):
+        self.cache=cache
+        # la caché no es segura entre hilos: una sola integración a la vez
+        self._bloqueo_cache=threading.Lock()
+        self._bloqueo=threading.Lock()
+        self._solicitud=0
+        self._cancelar=threading.Event()
+        self._estado="inactivo"
+        self._progreso=0.0
+        self._resultado=None
+        self._error=None
+
+    # enviar una nueva solicitud; devuelve su número
+    def enviar(self,metodo:str,p:Parametros,y0,t0:float,tf:float,tstep:float)->int:
+        with self._bloqueo:
+            self._cancelar.set()
+            self._solicitud+=1
+            solicitud=self._solicitud
+            cancelar=threading.Event()
+            self._cancelar=cancelar
+            self._estado="resolviendo"
+            self._progreso=0.0
+            self._resultado=None
+            self._error=None
+        hilo=threading.Thread(target=self._trabajar,args=(solicitud,cancelar,metodo,p,y0,t0,tf,tstep),daemon=True)
+        hilo.start()
+        return solicitud
+
+    # cancelar la solicitud en curso
+    def cancelar(self):
+        with self._bloqueo:
+            self._cancelar.set()
+            if self._estado=="resolviendo":
+                self._estado="cancelado"
+
+    # estado actual: (estado, progreso, resultado, error)
+    # estado es "inactivo", "resolviendo", "listo", "cancelado" o "error"
+    def consultar(self)->tuple:
+        with self._bloqueo:
+            return self._estado,self._progreso,self._resultado,self._error
+
+    def _vigente(self,solicitud:int)->bool:
+        return solicitud==self._solicitud
+
+    def _trabajar(self,solicitud:int,cancelar:threading.Event,metodo,p,y0,t0,tf,tstep):
+        def progreso(fraccion:float):
+            if cancelar.is_set():
+                raise SolucionCancelada()
+            with self._bloqueo:
+                if self._vigente(solicitud):
+                    self._progreso=fraccion
+        try:
+            with self._bloqueo_cache:
+                if cancelar.is_set():
+                    raise SolucionCancelada()
+                resultado=self.cache.resolver(metodo,p,y0,t0,tf,tstep,progreso=progreso)
+        except SolucionCancelada:
+            return
+        except Exception as error:
+            with self._bloqueo:
+                if self._vigente(solicitud):
+                    self._estado="error"
+                    self._error=error
+            return
+        with self._bloqueo:
+            if self._vigente(solicitud) and not cancelar.is_set():
+                self._estado="listo"
+                self._progreso=1.0
+                self._resultado=resultado
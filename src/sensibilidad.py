@@ -0,0 +1,60 @@
+from dataclasses import dataclass
+import numpy as np
+from modelo import Parametros, ORDEN_PARAMETROS, ORDEN_COMPARTIMIENTOS, derivadas, jacobiano, derivadas_parametros, validar_parametros
+from metodos import PASOS, malla_temporal, integrar, integrar_dormand_prince
+
+# análisis de sensibilidad hacia adelante
+# se integra el sistema SEIL junto con Z = dy/d(parámetros, condiciones iniciales):
+#   dZ/dt = J(y) Z + [df/dp | 0],  Z(t0) = [0 | I]
+# con J el jacobiano analítico; una sola integración reemplaza las 13+ corridas
+# de diferencias finitas
+
+# variables respecto a las que se deriva: 12 parámetros y 4 condiciones iniciales
+VARIABLES=ORDEN_PARAMETROS+tuple("{}0".format(nombre) for nombre in ORDEN_COMPARTIMIENTOS)
+
+
+@dataclass
+class SolucionSensibilidad:
+    t:np.ndarray                # malla de salida
+    y:np.ndarray                # solución, forma (len(t), 4)
+    sensibilidades:np.ndarray   # dy/dvariable, forma (len(t), 4, 16)
+
+    # serie de tiempo de d(compartimiento)/d(variable), p. ej. derivada("S","β")
+    def derivada(self,compartimiento:str,variable:str)->np.ndarray:
+        return self.sensibilidades[:,ORDEN_COMPARTIMIENTOS.index(compartimiento),VARIABLES.index(variable)]
+
+
+# lado derecho del sistema aumentado; el estado es una matriz (4, 17): [y | Z]
+def campo_aumentado(p:Parametros):
+    n=len(ORDEN_PARAMETROS)
+    def f(t,estado):
+        y=estado[:,0]
+        Z=estado[:,1:]
+        d=np.empty_like(estado)
+        d[:,0]=derivadas(y,p)
+        d[:,1:]=jacobiano(y,p)@Z
+        d[:,1:n+1]+=derivadas_parametros(y,p)
+        return d
+    return f
+
+
+# integrar el sistema con sensibilidades sobre la malla t
+# metodo es "dormand_prince" (por defecto) o uno de los métodos de paso fijo
+def integrar_sensibilidades(p:Parametros,y0,t:np.ndarray,metodo:str="dormand_prince",rtol:float=1e-8,atol:float=1e-10)->SolucionSensibilidad:
+    validar_parametros(p)
+    y0=np.asarray(y0,dtype=float)
+    inicial=np.zeros((len(ORDEN_COMPARTIMIENTOS),1+len(VARIABLES)))
+    inicial[:,0]=y0
+    inicial[:,1+len(ORDEN_PARAMETROS):]=np.eye(len(ORDEN_COMPARTIMIENTOS))
+    f=campo_aumentado(p)
+    if metodo=="dormand_prince":
+        estados=integrar_dormand_prince(f,inicial,t,rtol,atol).y
+    elif metodo in PASOS:
+        estados=integrar(PASOS[metodo],f,inicial,t)
+    else:
+        raise ValueError("método no soportado para sensibilidades: {}".format(metodo))
+    return SolucionSensibilidad(t,estados[:,:,0],estados[:,:,1:])
+
+
+def sensibilidades(p:Parametros,y0,t0:float=0,tf:float=20,tstep:float=1,metodo:str="dormand_prince")->SolucionSensibilidad:
+    return integrar_sensibilidades(p,y0,malla_temporal(t0,tf,tstep),metodo)
@@ -0,0 +1,280 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+import numpy as np
+from modelo import ORDEN_COMPARTIMIENTOS
+from metodos import PASOS, malla_temporal, integrar_en_malla, numero_puntos
+from barrido import integrar_lote
+from cache import CacheSoluciones, clave_solucion
+from consola import corrida_desde_diccionario, resumenes_por_defecto, resumen_largo_plazo
+
+# servicio HTTP local con los métodos de solución como API JSON
+#
+#   POST /simular  {"parametros", "iniciales", "t0", "tf", "tstep", "metodo", "salida"}
+#                  (mismo formato que un escenario de consola.py); salida es
+#                  "trayectoria" (por defecto: t, S, E, I, L) o "resumen" (métricas)
+#                  con "largo_plazo": true (o tf = inf) la respuesta son los valores de
+#                  largo plazo {"largo_plazo": {S, E, I, L}}, calculados sin integrar
+#   GET  /estado   contadores de la caché, solicitudes agrupadas y lotes
+#
+# las solicitudes iguales que llegan mientras una está en curso esperan el mismo
+# resultado; las de métodos de paso fijo con la misma malla se juntan durante
+# ventana_lote segundos y se resuelven como un solo barrido vectorizado; las soluciones
+# quedan en una CacheSoluciones en memoria
+#
+# uso: python servidor.py [--host 127.0.0.1] [--puerto 8765] [--trabajadores 4]
+
+LARGO_MAXIMO_CUERPO=1<<20
+# puntos de la malla t0:tstep:tf que acepta una solicitud (la trayectoria se guarda entera)
+PUNTOS_MAXIMOS=200_000
+
+
+# nan e inf no son JSON válido: se envían como null
+def _json_valido(valor):
+    if isinstance(valor,float):
+        return valor if math.isfinite(valor) else None
+    if isinstance(valor,dict):
+        return {clave:_json_valido(x) for clave,x in valor.items()}
+    if isinstance(valor,list):
+        return [_json_valido(x) for x in valor]
+    return valor
+
+
+class SolicitudInvalida(Exception):
+    def __init__(self,mensaje:str,estado:HTTPStatus=HTTPStatus.BAD_REQUEST):
+        super().__init__(mensaje)
+        self.estado=estado
+
+
+class ServidorSimulacion:
+    def __init__(self,cache:CacheSoluciones=None,trabajadores:int=None,ventana_lote:float=0.002,tam_lote:int=256):
+        self.cache=cache if cache is not None else CacheSoluciones()
+        self.ventana_lote=ventana_lote
+        self.tam_lote=tam_lote
+        self._ejecutor=ThreadPoolExecutor(max_workers=trabajadores or os.cpu_count() or 1)
+        # clave -> futuro de las solicitudes en curso
+        self._pendientes={}
+        # (método, t0, tf, tstep) -> lista de (parámetros, iniciales, futuro)
+        self._lotes={}
+        self.contadores={"solicitudes":0,"agrupadas":0,"lotes":0,"escenarios_en_lotes":0,"individuales":0,"largo_plazo":0}
+
+    # trayectoria (t, y) de un escenario: desde la caché, esperando una solicitud igual
+    # en curso, en un lote o integrando sola
+    # la caché solo se usa desde el hilo del bucle de eventos; los hilos solo integran
+    async def resolver(self,metodo:str,p,y0,t0:float,tf:float,tstep:float)->tuple:
+        self.contadores["solicitudes"]+=1
+        clave=clave_solucion(metodo,p,y0,t0,tf,tstep)
+        solucion=self.cache.obtener(clave)
+        if solucion is not None:
+            return solucion
+        if clave in self._pendientes:
+            self.contadores["agrupadas"]+=1
+            return await asyncio.shield(self._pendientes[clave])
+        futuro=asyncio.get_running_loop().create_future()
+        self._pendientes[clave]=futuro
+        try:
+            if metodo in PASOS:
+                self._agregar_a_lote(metodo,p,y0,t0,tf,tstep,futuro)
+                t,y=await asyncio.shield(futuro)
+            else:
+                self.contadores["individuales"]+=1
+                t=malla_temporal(t0,tf,tstep)
+                y=await asyncio.get_running_loop().run_in_executor(self._ejecutor,integrar_en_malla,metodo,p,y0,t)
+                futuro.set_result((t,y))
+            return self.cache.guardar(clave,t,y)
+        except BaseException as error:
+            if not futuro.done():
+                futuro.set_exception(error)
+            # evitar el aviso de excepción no recuperada si nadie más la esperaba
+            futuro.exception()
+            raise
+        finally:
+            del self._pendientes[clave]
+
+    def _agregar_a_lote(self,metodo,p,y0,t0,tf,tstep,futuro):
+        grupo=(metodo,float(t0),float(tf),float(tstep))
+        lote=self._lotes.get(grupo)
+        if lote is None:
+            lote=self._lotes[grupo]=[]
+            asyncio.get_running_loop().call_later(self.ventana_lote,self._cerrar_lote,grupo)
+        lote.append((p,y0,futuro))
+        if len(lote)>=self.tam_lote:
+            self._cerrar_lote(grupo)
+
+    # resolver un lote completo como un barrido en un hilo
+    def _cerrar_lote(self,grupo):
+        lote=self._lotes.pop(grupo,None)
+        if not lote:
+            return
+        metodo,t0,tf,tstep=grupo
+        self.contadores["lotes"]+=1
+        self.contadores["escenarios_en_lotes"]+=len(lote)
+        asyncio.get_running_loop().create_task(self._resolver_lote(metodo,t0,tf,tstep,lote))
+
+    async def _resolver_lote(self,metodo,t0,tf,tstep,lote):
+        try:
+            t=malla_temporal(t0,tf,tstep)
+            parametros=np.array([tuple(p) for p,_,_ in lote],dtype=float)
+            iniciales=np.array([y0 for _,y0,_ in lote],dtype=float)
+            y=await asyncio.get_running_loop().run_in_executor(self._ejecutor,integrar_lote,metodo,parametros,iniciales,t)
+        except Exception as error:
+            for _,_,futuro in lote:
+                if not futuro.done():
+                    futuro.set_exception(error)
+            return
+        for i,(_,_,futuro) in enumerate(lote):
+            if not futuro.done():
+                futuro.set_result((t,np.array(y[i])))
+
+    # respuesta JSON para el cuerpo de POST /simular
+    async def simular(self,datos)->dict:
+        if not isinstance(datos,dict):
+            raise SolicitudInvalida("se esperaba un objeto JSON")
+        salida=datos.get("salida","trayectoria")
+        if salida not in ("trayectoria","resumen"):
+            raise SolicitudInvalida("salida desconocida: {}".format(salida))
+        try:
+            corrida=corrida_desde_diccionario(datos)
+        except (KeyError,TypeError,ValueError,OverflowError) as error:
+            raise SolicitudInvalida("escenario inválido: {}".format(error))
+        escenario=corrida.escenario
+        if corrida.largo_plazo:
+            self.contadores["largo_plazo"]+=1
+            try:
+                valores=resumen_largo_plazo(escenario.parametros)
+            except ValueError as error:
+                raise SolicitudInvalida(str(error),HTTPStatus.UNPROCESSABLE_ENTITY)
+            return {"largo_plazo":{nombre:valores["{}_largo_plazo".format(nombre)] for nombre in ORDEN_COMPARTIMIENTOS}}
+        # la malla se valida antes de reservarla: t0, tf y tstep finitos, tstep > 0 y a lo
+        # sumo PUNTOS_MAXIMOS puntos
+        try:
+            puntos=numero_puntos(escenario.t0,escenario.tf,escenario.tstep)
+        except ValueError as error:
+            raise SolicitudInvalida("malla temporal inválida: {}".format(error))
+        if puntos>PUNTOS_MAXIMOS:
+            raise SolicitudInvalida("la malla temporal tiene {} puntos (máximo {})".format(puntos,PUNTOS_MAXIMOS),
+                                    HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        try:
+            with np.errstate(all="ignore"):
+                t,y=await self.resolver(corrida.metodo,escenario.parametros,escenario.iniciales,escenario.t0,escenario.tf,escenario.tstep)
+        except (ValueError,RuntimeError,FloatingPointError) as error:
+            raise SolicitudInvalida(str(error),HTTPStatus.UNPROCESSABLE_ENTITY)
+        if salida=="resumen":
+            resumenes=resumenes_por_defecto()
+            for resumen in resumenes:
+                resumen.iniciar(escenario.parametros)
+                resumen.actualizar(t,y)
+            return {"resumen":{nombre:valor for resumen in resumenes for nombre,valor in resumen.valores().items()}}
+        respuesta={"t":t.tolist()}
+        respuesta.update({nombre:y[:,i].tolist() for i,nombre in enumerate(ORDEN_COMPARTIMIENTOS)})
+        return respuesta
+
+    def estado(self)->dict:
+        return dict(self.contadores,en_cache=len(self.cache),aciertos=self.cache.aciertos,fallos=self.cache.fallos,
+                    bytes_cache=self.cache.bytes_usados)
+
+    # atender una conexión HTTP/1.1 (con keep-alive)
+    async def atender(self,lector:asyncio.StreamReader,escritor:asyncio.StreamWriter):
+        try:
+            while True:
+                linea=await lector.readline()
+                if not linea:
+                    break
+                try:
+                    metodo_http,ruta,version=linea.decode("latin-1").split()
+                except ValueError:
+                    await self._responder(escritor,HTTPStatus.BAD_REQUEST,{"error":"línea de solicitud inválida"},False)
+                    break
+                encabezados={}
+                while True:
+                    linea=await lector.readline()
+                    if linea in (b"\r\n",b"\n",b""):
+                        break
+                    nombre,_,valor=linea.decode("latin-1").partition(":")
+                    encabezados[nombre.strip().lower()]=valor.strip()
+                conexion=encabezados.get("connection","").lower()
+                seguir=conexion!="close" if version=="HTTP/1.1" else conexion=="keep-alive"
+                try:
+                    largo=int(encabezados.get("content-length",0) or 0)
+                except ValueError:
+                    largo=-1
+                if largo<0:
+                    await self._responder(escritor,HTTPStatus.BAD_REQUEST,{"error":"Content-Length inválido"},False)
+                    break
+                if largo>LARGO_MAXIMO_CUERPO:
+                    await self._responder(escritor,HTTPStatus.REQUEST_ENTITY_TOO_LARGE,{"error":"cuerpo demasiado grande"},False)
+                    break
+                cuerpo=await lector.readexactly(largo) if largo else b""
+                estado,respuesta=await self._despachar(metodo_http,ruta,cuerpo)
+                await self._responder(escritor,estado,respuesta,seguir)
+                if not seguir:
+                    break
+        except (ConnectionError,asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    async def _despachar(self,metodo_http:str,ruta:str,cuerpo:bytes)->tuple:
+        ruta=ruta.split("?",1)[0]
+        try:
+            if ruta=="/simular":
+                if metodo_http!="POST":
+                    raise SolicitudInvalida("use POST",HTTPStatus.METHOD_NOT_ALLOWED)
+                try:
+                    datos=json.loads(cuerpo or b"null")
+                except ValueError as error:
+                    raise SolicitudInvalida("JSON inválido: {}".format(error))
+                return HTTPStatus.OK,await self.simular(datos)
+            if ruta=="/estado":
+                return HTTPStatus.OK,self.estado()
+            raise SolicitudInvalida("ruta desconocida: {}".format(ruta),HTTPStatus.NOT_FOUND)
+        except SolicitudInvalida as error:
+            return error.estado,{"error":str(error)}
+        # cualquier otro error se responde en vez de cortar la conexión sin respuesta
+        except Exception as error:
+            return HTTPStatus.INTERNAL_SERVER_ERROR,{"error":"{}: {}".format(type(error).__name__,error)}
+
+    async def _responder(self,escritor:asyncio.StreamWriter,estado:HTTPStatus,respuesta:dict,seguir:bool):
+        cuerpo=json.dumps(_json_valido(respuesta),ensure_ascii=False).encode("utf-8")
+        escritor.write("HTTP/1.1 {} {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\nConnection: {}\r\n\r\n".format(
+            estado.value,estado.phrase,len(cuerpo),"keep-alive" if seguir else "close").encode("latin-1")+cuerpo)
+        await escritor.drain()
+
+    async def iniciar(self,host:str="127.0.0.1",puerto:int=8765)->asyncio.AbstractServer:
+        return await asyncio.start_server(self.atender,host,puerto)
+
+    def cerrar(self):
+        self._ejecutor.shutdown(wait=False)
+
+
+async def _servir(host:str,puerto:int,trabajadores:int,ventana_lote:float):
+    servidor=ServidorSimulacion(trabajadores=trabajadores,ventana_lote=ventana_lote)
+    try:
+        async with await servidor.iniciar(host,puerto) as conexiones:
+            print("sirviendo en http://{}:{}".format(host,puerto))
+            await conexiones.serve_forever()
+    finally:
+        servidor.cerrar()
+
+
+def main(argumentos=None)->int:
+    parser=argparse.ArgumentParser(description="Servicio HTTP local de simulación SEIL")
+    parser.add_argument("--host",default="127.0.0.1",help="dirección (por defecto solo local)")
+    parser.add_argument("--puerto",type=int,default=8765,help="puerto")
+    parser.add_argument("--trabajadores",type=int,default=None,help="hilos para integrar (por defecto uno por núcleo)")
+    parser.add_argument("--ventana-lote",type=float,default=0.002,help="segundos que se esperan para juntar solicitudes en un lote")
+    args=parser.parse_args(argumentos)
+    try:
+        asyncio.run(_servir(args.host,args.puerto,args.trabajadores,args.ventana_lote))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__=="__main__":
+    sys.exit(main())
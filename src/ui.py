@@ -1,17 +1,26 @@
-import tkinter as tk
-import tkinter.font as tkfont
-from typing import Callable
-from matplotlib.figure import Figure
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from __future__ import annotations
+from collections.abc import Callable
 import numpy as np
 from pathlib import Path
-import scipy.integrate._ivp as ivp
-import struct
+from modelo import Parametros
+from cache import CacheSoluciones
+from segundo_plano import SolucionEnSegundoPlano
+from escenarios import AlmacenEscenarios, Escenario, NOMBRE_IMPORTADO
+from exportar import exportar_trayectoria
+
+# tkinter y matplotlib se importan al abrir la ventana (cargar_interfaz), así el módulo
+# se puede importar sin pantalla y sin pagar su tiempo de carga
+tk = None
+tkfont = None
+tkfiledialog = None
+FigureCanvasTkAgg = None
+NavigationToolbar2Tk = None
+GraficaSEIL = None
 
 # variables globales para usar en las funciones
 
-figure = Figure()
+figure = None
+grafica = None
 subpanel_grafica = None
 canvas = None
 
@@ -20,7 +29,6 @@ canvas = None
 assets_folder = Path(__file__).parent.parent.joinpath("assets")
 data_folder = Path(__file__).parent.parent.joinpath("data")
 data_file = data_folder / "save.bin"
-data_file.touch(exist_ok=True)
 iconFile = assets_folder / "python_icon.ico"
 
 # paleta de colores
@@ -76,6 +84,7 @@ E0=2
 I0=3
 L0=4
 # valores calculados de cada funcion
+valT=None
 valS=None
 valE=None
 valI=None
@@ -83,118 +92,103 @@ valL=None
 
 
 # implementación de métodos de solución
-# funciones matemáticas
+# los métodos están en metodos.py; aquí solo se leen los parámetros de la interfaz
+
+# parámetros actuales de la interfaz como objeto del modelo
+def parametros_actuales()->Parametros:
+    return Parametros(Λ,β,δ,ρ,μ,k,r1,r2,φ,γ,d1,d2)
+
+# soluciones ya calculadas; repetir un escenario no vuelve a integrar
+cache_soluciones=CacheSoluciones()
+
+# resolver con un método de metodos.py usando los valores de la interfaz
+def resolver_metodo(metodo:str)->tuple:
+    if(is_a_parameter_none()):
+        create_message("Parámetros incompletos","ingrese todos los parámetros antes de resolver")
+        return None
+    t,y=cache_soluciones.resolver(metodo,parametros_actuales(),(S0,E0,I0,L0),t0,tf,tstep)
+    return (t,*y.T)
+
 # Euler hacia adelante
 def euler_hacia_adelante()->tuple:
-    t=np.arange(t0,tf+tstep,tstep)
-    S=np.zeros(len(t))
-    E=np.zeros(len(t))
-    I=np.zeros(len(t))
-    L=np.zeros(len(t))
-    S[0]=S0
-    E[0]=E0
-    I[0]=I0
-    L[0]=L0
-    for i in range(len(t)-1):
-        S[i+1]=S[i]+SFunc(S[i],I[i],L[i])*tstep
-        E[i+1]=E[i]+EFunc(S[i],E[i],I[i],L[i])*tstep
-        I[i+1]=I[i]+IFunc(S[i],E[i],I[i],L[i])*tstep
-        L[i+1]=L[i]+LFunc(I[i],L[i])*tstep
-    return t,S,E,I,L
+    return resolver_metodo("euler_hacia_adelante")
 
 # Euler hacia atrás
 def euler_hacia_atras()->tuple:
-    t=np.arange(t0,tf+tstep,tstep)
-    S=np.zeros(len(t))
-    E=np.zeros(len(t))
-    I=np.zeros(len(t))
-    L=np.zeros(len(t))
-    S[0]=S0
-    E[0]=E0
-    I[0]=I0
-    L[0]=L0
-    for i in range(len(t)-1):
-        S[i+1]=S[i]+SFunc(S[i],I[i],L[i])*tstep
-        E[i+1]=E[i]+EFunc(S[i],E[i],I[i],L[i])*tstep
-        I[i+1]=I[i]+IFunc(S[i],E[i],I[i],L[i])*tstep
-        L[i+1]=L[i]+LFunc(I[i],L[i])*tstep
-    return t,S,E,I,L
+    return resolver_metodo("euler_hacia_atras")
+
 # Euler modificado
 def euler_modificado()->tuple:
-    t=np.arange(t0,tf+tstep,tstep)
-    S=np.zeros(len(t))
-    E=np.zeros(len(t))
-    I=np.zeros(len(t))
-    L=np.zeros(len(t))
-    S[0]=S0
-    E[0]=E0
-    I[0]=I0
-    L[0]=L0
-    for i in range(len(t)-1):
-        S[i+1]=S[i]+SFunc(S[i],I[i],L[i])*tstep
-        E[i+1]=E[i]+EFunc(S[i],E[i],I[i],L[i])*tstep
-        I[i+1]=I[i]+IFunc(S[i],E[i],I[i],L[i])*tstep
-        L[i+1]=L[i]+LFunc(I[i],L[i])*tstep
-    return t,S,E,I,L
+    return resolver_metodo("euler_modificado")
+
 # Runge-Kutta 4
 def runge_kutta_4()->tuple:
-    t=np.arange(t0,tf+tstep,tstep)
-    S=np.zeros(len(t))
-    E=np.zeros(len(t))
-    I=np.zeros(len(t))
-    L=np.zeros(len(t))
-    S[0]=S0
-    E[0]=E0
-    I[0]=I0
-    L[0]=L0
-    for i in range(len(t)-1):
-        k1=SFunc(S[i],I[i],L[i])
-        k2=EFunc(S[i],E[i],I[i],L[i])
-        k3=IFunc(S[i],E[i],I[i],L[i])
-        k4=LFunc(I[i],L[i])
-        S[i+1]=S[i]+tstep*(k1+2*k2+2*k3+k4)/6
-        E[i+1]=E[i]+tstep*(k1+2*k2+k4)/6
-        I[i+1]=I[i]+tstep*(k1+k2+2*k3+k4)/6
-        L[i+1]=L[i]+tstep*(k1+k2+k3+2*k4)/6
-    return t,S,E,I,L
+    return resolver_metodo("runge_kutta_4")
 
 # Runge-Kutta 2
 def runge_kutta_2()->tuple:
-    t=np.arange(t0,tf+tstep,tstep)
-    S=np.zeros(len(t))
-    E=np.zeros(len(t))
-    I=np.zeros(len(t))
-    L=np.zeros(len(t))
-    S[0]=S0
-    E[0]=E0
-    I[0]=I0
-    L[0]=L0
-    for i in range(len(t)-1):
-        k1=SFunc(S[i],I[i],L[i])
-        k2=EFunc(S[i],E[i],I[i],L[i])
-        S[i+1]=S[i]+tstep*(k1+k2)/2
-        E[i+1]=E[i]+tstep*k2
-    return t,S,E,I,L
+    return resolver_metodo("runge_kutta_2")
 
 # Solve_IVP
 def solve_ivp()->tuple:
-    t=np.arange(t0,tf+tstep,tstep)
-    S=np.zeros(len(t))
-    E=np.zeros(len(t))
-    I=np.zeros(len(t))
-    L=np.zeros(len(t))
-    S[0]=S0
-    E[0]=E0
-    I[0]=I0
-    L[0]=L0
-    def deriv(t,y):
-        return np.array([SFunc(y[0],y[1],y[2]),EFunc(y[0],y[1],y[2],y[3]),IFunc(y[0],y[1],y[2],y[3]),LFunc(y[2],y[3])])
-    sol=solve_ivp(deriv,(t0,tf),[S0,E0,I0,L0],t_eval=t)
-    S=sol.y[0]
-    E=sol.y[1]
-    I=sol.y[2]
-    L=sol.y[3]
-    return t,S,E,I,L
+    return resolver_metodo("solve_ivp")
+
+# resolución en segundo plano para los botones de método
+# la ventana revisa el estado con window.after y grafica el resultado al terminar
+solucion_en_segundo_plano=SolucionEnSegundoPlano(cache_soluciones)
+metodo_actual=None
+ventana=None
+etiqueta_progreso=None
+revision_programada=False
+intervalo_revision=50 # milisegundos
+
+def iniciar_metodo(metodo:str):
+    global metodo_actual
+    if(is_a_parameter_none()):
+        create_message("Parámetros incompletos","ingrese todos los parámetros antes de resolver")
+        return
+    metodo_actual=metodo
+    solucion_en_segundo_plano.enviar(metodo,parametros_actuales(),(S0,E0,I0,L0),t0,tf,tstep)
+    programar_revision()
+    return
+
+def cancelar_metodo():
+    solucion_en_segundo_plano.cancelar()
+    programar_revision()
+    return
+
+def programar_revision():
+    global revision_programada
+    if not revision_programada and ventana is not None:
+        revision_programada=True
+        ventana.after(intervalo_revision,revisar_solucion)
+    return
+
+def revisar_solucion():
+    global revision_programada,valT,valS,valE,valI,valL
+    revision_programada=False
+    estado,progreso,resultado,error=solucion_en_segundo_plano.consultar()
+    if etiqueta_progreso is not None:
+        textos={"inactivo":"","resolviendo":"Resolviendo... {:.0%}".format(progreso),"listo":"Listo","cancelado":"Cancelado","error":"Error"}
+        etiqueta_progreso.configure(text=textos[estado])
+    if estado=="resolviendo":
+        programar_revision()
+    elif estado=="listo":
+        t,y=resultado
+        valT=t
+        valS,valE,valI,valL=y.T
+        calcular_gráfica()
+    elif estado=="error":
+        create_message("Error",str(error))
+    return
+
+# volver a resolver con el último método (p. ej. al cambiar el tiempo de simulación)
+def actualizar_solucion():
+    if metodo_actual is not None and not is_a_parameter_none():
+        iniciar_metodo(metodo_actual)
+    else:
+        calcular_gráfica()
+    return
 
 # Susceptibles
 def SFunc(S:float,I:float,L:float)->float:
@@ -225,81 +219,92 @@ text_font=("Segoe UI Semibold", 12)
 
 # cargar y guardar datos
 
-# cargar parámetros como doubles
+# nombre con el que la interfaz guarda su escenario
+nombre_escenario="interfaz"
+
+# cargar el último escenario guardado (parámetros, estado inicial y tiempo)
+# la interfaz convierte un save.bin antiguo al abrirlo; ese escenario importado solo trae
+# parámetros, como el cargador anterior
 def load_data():
-    loadfile=open(data_file,"rb")
-    buffer=loadfile.read()
-    params=struct.unpack("d"*int(len(buffer)/8),buffer)
-    global Λ,β,δ,ρ,μ,k,r1,r2,φ,γ,d1,d2 
-    Λ,β,δ,ρ,μ,k,r1,r2,φ,γ,d1,d2=params
+    global Λ,β,δ,ρ,μ,k,r1,r2,φ,γ,d1,d2,S0,E0,I0,L0,t0,tf,tstep
+    try:
+        with AlmacenEscenarios(data_file) as almacen:
+            almacen.importar_antiguo()
+            escenario=almacen.ultimo()
+    except ValueError as error:
+        create_message("Error al cargar",str(error))
+        return
+    if escenario is None:
+        create_message("Sin datos","no hay datos guardados")
+        return
+    Λ,β,δ,ρ,μ,k,r1,r2,φ,γ,d1,d2=escenario.parametros
+    if escenario.nombre!=NOMBRE_IMPORTADO:
+        S0,E0,I0,L0=escenario.iniciales
+        t0,tf,tstep=escenario.t0,escenario.tf,escenario.tstep
 
     print("loaded data {}".format((Λ,β,δ,ρ,μ,k,r1,r2,φ,γ,d1,d2)))
     create_message("Datos cargados","datos cargados correctamente")
     return
 
 
-# guardar parámetros como doubles
+# guardar el escenario actual al final del archivo de escenarios
 def save_data():
-    savefile=open(data_file,"wb")
-    global Λ,β,δ,ρ,μ,k,r1,r2,φ,γ,d1,d2 
-    params=Λ,β,δ,ρ,μ,k,r1,r2,φ,γ,d1,d2 
-    bytes=struct.pack("d"*int(len(params)),*params) 
-    print("saved data {}".format(params))
-    savefile.write(bytes)
-    savefile.close()
+    if(is_a_parameter_none()):
+        create_message("Parámetros incompletos","ingrese todos los parámetros antes de guardar")
+        return
+    escenario=Escenario(nombre_escenario,parametros_actuales(),(S0,E0,I0,L0),t0,tf,tstep)
+    try:
+        with AlmacenEscenarios(data_file) as almacen:
+            almacen.importar_antiguo()
+            almacen.agregar(escenario)
+    except ValueError as error:
+        create_message("Error al guardar",str(error))
+        return
+    print("saved data {}".format(tuple(escenario.parametros)))
     create_message("Datos guardados","datos guardados correctamente")
     return
 
 
+# exportar la solución graficada (t, S, E, I, L) en formato columnar
+def export_trajectory():
+    if(valT is None or valS is None or valE is None or valI is None or valL is None):
+        create_message("Sin solución","resuelva el modelo antes de exportar la solución")
+        return
+    archivo=tkfiledialog.asksaveasfilename(initialdir=data_folder,initialfile="trayectoria.seil",defaultextension=".seil",
+                                           filetypes=[("Trayectoria SEIL","*.seil")])
+    if not archivo:
+        return
+    exportar_trayectoria(archivo,valT,np.column_stack((valS,valE,valI,valL)),dtype=np.float32,comprimir=True)
+    print("exported trajectory {}".format(archivo))
+    create_message("Solución exportada","solución exportada correctamente")
+    return
+
+
 # configurar gráfica
 def calcular_gráfica():
-    global canvas,figure,showE,showI,showL,showS,valE,valI,valL,valS
-    ax = figure.add_subplot(111)
-    ax.clear()
-    # testing
-    t = np.linspace(t0, tf, int(abs(tf-t0)*360))
-
-    y1=valS
-    y2=valE
-    y3=valI
-    y4=valL
-
-    if(y1 is None or y2 is None or y3 is None or y4 is None):
-        y1=[x+1 for x in t]
-        y2=[x+2 for x in t]
-        y3=[x+3 for x in t]
-        y4=[x+4 for x in t]
-    
-    shs=ax.plot(t,y1,label="S",color="#3636FF")
-    she=ax.plot(t,y2,label="E",color="#51A651")
-    shi=ax.plot(t,y3,label="I",color="#fb3d3d")
-    shl=ax.plot(t,y4,label="L",color="#000000")
-
-    if not showS:
-        shs=shs.pop(0)
-        shs.remove()
-    elif not showE:
-        she=she.pop(0)
-        she.remove()
-    elif not showI:
-        shi=shi.pop(0)
-        shi.remove()
-    elif not showL:
-        shl=shl.pop(0)
-        shl.remove()
-
-    ax.grid(True)
-    ax.set_xlim(t0, tf)
-    ax.set_ylim(0, max(y1+y2+y3+y4))
-    ax.set_xticks(np.arange(t0, tf, tstep))
-    ax.legend(["S","E","I","L"],loc="upper right")
-    if canvas is not None:
-        canvas.draw()
+    global grafica
+    if grafica is None:
+        grafica=GraficaSEIL(figure)
+
+    if(valT is None or valS is None or valE is None or valI is None or valL is None):
+        # datos de prueba mientras no haya una solución
+        t=np.linspace(t0, tf, int(abs(tf-t0)*360))
+        y=t[:,None]+np.arange(1,5)
+    else:
+        t=valT
+        y=np.column_stack((valS,valE,valI,valL))
+
+    grafica.actualizar(t,y,tstep,{"S":showS,"E":showE,"I":showI,"L":showL})
     return
 
+# la barra de matplotlib permite hacer zoom y desplazar la gráfica; al cambiar el
+# rango del eje x la gráfica vuelve a diezmar los datos para el nuevo rango
 def configurar_grafica(subpanel_grafica):
     global canvas,figure
     canvas = FigureCanvasTkAgg(figure, master=subpanel_grafica)
+    barra = NavigationToolbar2Tk(canvas, subpanel_grafica, pack_toolbar=False)
+    barra.update()
+    barra.pack(side=tk.BOTTOM, fill=tk.X)
     canvas.get_tk_widget().pack(anchor=tk.N, fill=tk.BOTH, expand=1)
     return
 
@@ -314,7 +319,10 @@ def set_visible(s:str):
         showI = not showI
     elif s=="L":
         showL = not showL
-    calcular_gráfica()
+    if grafica is not None:
+        grafica.mostrar(s,{"S":showS,"E":showE,"I":showI,"L":showL}[s])
+    else:
+        calcular_gráfica()
     print("state: {};{};{};{};".format(showS,showE,showI,showL))
     return
 
@@ -353,7 +361,7 @@ def set_start_time(x):
         t0=x
     else:
         t0=0
-    calcular_gráfica()
+    actualizar_solucion()
     return
 
 def set_end_time(x):
@@ -362,7 +370,7 @@ def set_end_time(x):
         tf=x
     else:
         tf=20
-    calcular_gráfica()
+    actualizar_solucion()
     return
 
 def set_step_time(x):
@@ -371,7 +379,7 @@ def set_step_time(x):
         tstep=x
     else:
         tstep=1
-    calcular_gráfica()
+    actualizar_solucion()
     print("tstep: {}".format(tstep))
     return
 
@@ -471,12 +479,23 @@ def configurar_panel_cerrar_dialogo(window):
 
 def agregar_boton_metodo(panel,window,metodo:str,funcion:Callable):
     padding=calculate_screen_percent_size(window,5)
-    button = tk.Button(panel,command=lambda event:funcion)
+    button = tk.Button(panel,command=funcion)
     button.configure(text=metodo)
     configurar_boton_gris(button,window)
     button.pack(anchor=tk.N,pady=padding)
     return
 
+def agregar_panel_progreso(panel,window):
+    global etiqueta_progreso
+    padding=calculate_screen_percent_size(window,5)
+    etiqueta_progreso=tk.Label(panel,text="",font=text_font,background=background_color,foreground=text_color_dark)
+    etiqueta_progreso.pack(anchor=tk.N,pady=padding)
+    cancelar = tk.Button(panel,command = lambda: cancelar_metodo())
+    cancelar.configure(text = "Cancelar")
+    configurar_boton_rojo(cancelar,window)
+    cancelar.pack(anchor=tk.N,fill=tk.X)
+    return
+
 def create_message(parametro,descripcion):
     
     # create a toplevel window
@@ -523,16 +542,18 @@ def configurar_panel_metodo_solucion(window):
 
     dummyfunc=lambda: print("TODO: dummy function")
 
-    botones=[   {"metodo":"Euler adelante","funcion":lambda:euler_hacia_adelante()},
-                {"metodo":"Euler atrás","funcion":lambda:euler_hacia_atras()},
-                {"metodo":"Euler modificado","funcion":lambda:euler_modificado},
-                {"metodo":"Runge-Kutta 2","funcion":lambda:runge_kutta_2()},
-                {"metodo":"Runge-Kutta 4","funcion":lambda:runge_kutta_4()},
-                {"metodo":"Solve_IVP","funcion":lambda:solve_ivp()}]
+    botones=[   {"metodo":"Euler adelante","funcion":lambda:iniciar_metodo("euler_hacia_adelante")},
+                {"metodo":"Euler atrás","funcion":lambda:iniciar_metodo("euler_hacia_atras")},
+                {"metodo":"Euler modificado","funcion":lambda:iniciar_metodo("euler_modificado")},
+                {"metodo":"Runge-Kutta 2","funcion":lambda:iniciar_metodo("runge_kutta_2")},
+                {"metodo":"Runge-Kutta 4","funcion":lambda:iniciar_metodo("runge_kutta_4")},
+                {"metodo":"Solve_IVP","funcion":lambda:iniciar_metodo("solve_ivp")}]
 
     for boton in botones:
         agregar_boton_metodo(panel_botones,window,boton["metodo"],boton["funcion"])
 
+    agregar_panel_progreso(panel_botones,window)
+
     titulo.pack(anchor=tk.N, fill=tk.X)
     panel_titulo.pack(anchor=tk.N,fill=tk.NONE,expand=False)
     panel_botones.pack(anchor=tk.N, fill=tk.Y,expand=False)
@@ -594,11 +615,22 @@ def agregar_boton_exportar(panel,window):
     importar.pack(fill = tk.X, side=tk.LEFT,padx=padding)
     return
 
+def agregar_boton_exportar_solucion(panel,window):
+    padding=calculate_screen_percent_size(window,5)
+    width=calculate_screen_percent_size(window,10)
+
+    exportar = tk.Button(panel,width= width,command = lambda: export_trajectory())
+    exportar.configure( text = "Exportar solución")
+    configurar_boton_rojo(exportar,window)
+    exportar.pack(fill = tk.X, side=tk.LEFT,padx=padding)
+    return
+
 def configurar_panel_importar_exportar(panel,window):
     width = calculate_screen_percent_size(window,50)
     panel_botones=tk.Frame(panel,width=width,background=background_color,)
     agregar_boton_importar(panel_botones,window)
     agregar_boton_exportar(panel_botones,window)
+    agregar_boton_exportar_solucion(panel_botones,window)
     panel_botones.pack(anchor=tk.E, fill=tk.NONE)
     return
 
@@ -690,9 +722,29 @@ def configurar_panel_izquierdo(window):
     return
 
 
+# importar tkinter y matplotlib y crear la figura
+def cargar_interfaz():
+    global tk,tkfont,tkfiledialog,FigureCanvasTkAgg,NavigationToolbar2Tk,GraficaSEIL,figure
+    if tk is not None:
+        return
+    import tkinter
+    import tkinter.font
+    import tkinter.filedialog
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg as canvas_tk, NavigationToolbar2Tk as barra_tk
+    from grafica import GraficaSEIL as grafica_seil
+    tk,tkfont,tkfiledialog=tkinter,tkinter.font,tkinter.filedialog
+    FigureCanvasTkAgg,NavigationToolbar2Tk,GraficaSEIL=canvas_tk,barra_tk,grafica_seil
+    figure=Figure()
+    return
+
+
 def setup_window():
+    global ventana
+    cargar_interfaz()
     # crear instancia de la ventana
     window = tk.Tk()
+    ventana = window
     # agregar titulo a la ventana
     window.title("IBIO 2240 - Programación Científica | Proyecto final")
     '''
@@ -747,4 +799,5 @@ def setup_window():
     tk.mainloop()
     return
 
-setup_window()
+if __name__=="__main__":
+    setup_window()